@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import (authentication, fragments,  # noqa: F401
+                       meal_plans, references, tokens)
+        from .caching import require_shared
+        if settings.JWT_AUTH_ENABLED:
+            # Отозванные токены хранятся в кэше и должны быть видны
+            # всем воркерам.
+            require_shared('JWT_AUTH_ENABLED')
+        if settings.DATABASE_REPLICAS:
+            # Закрепление клиента за основной базой после записи
+            # (foodgram.replicas.pin) тоже хранится в кэше.
+            require_shared('DB_REPLICAS')
@@ -0,0 +1,212 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import (APIException, AuthenticationFailed,
+                                       NotAuthenticated, NotFound,
+                                       PermissionDenied, Throttled)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from events.outbox import events_after, publish
+from recipes.models import Cart, Recipe
+from . import references
+from .fast_serializers import RecipeReader, compiled
+from .fieldsets import FieldSelection
+from .filters import RecipeFilter, ingredients_by_name
+from .pagination import CustomPaginator
+from .params import search_query
+from .renderers import FastJSONRenderer
+from .serializers import IngredientSerializer, TagSerializer
+from .views import (EventListView, IngredientViewSet, RecipeViewSet,
+                    TagViewSet, cart_param, event_params, events_page,
+                    shopping_list_response, shopping_list_items)
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        FastJSONRenderer().render(data), status=status,
+        content_type='application/json',
+    )
+
+
+def error_response(exc):
+    detail = exc.detail
+    if not isinstance(detail, (list, dict)):
+        detail = {'detail': detail}
+    response = json_response(detail, exc.status_code)
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+        response['WWW-Authenticate'] = authenticator.authenticate_header(None)
+    if isinstance(exc, Throttled) and exc.wait is not None:
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+@sync_to_async
+def authenticate(request, view, kwargs):
+    """DRF Request с пользователем из DEFAULT_AUTHENTICATION_CLASSES.
+
+    Ограничения запросов проверяются экземпляром DRF-представления view,
+    как если бы запрос обработал он.
+    """
+    request = Request(request, authenticators=[
+        authenticator()
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    request.user  # аутентификация выполняется при первом обращении
+    instance = view.cls(**view.initkwargs)
+    instance.action = getattr(view, 'actions', {}).get('get')
+    instance.request, instance.args, instance.kwargs = request, (), kwargs
+    instance.check_throttles(request)
+    return request
+
+
+def async_get(fallback):
+    """GET обрабатывается async-функцией, остальное — DRF-представлением.
+
+    Запросы браузера (Accept: text/html) и все методы, кроме GET,
+    передаются в fallback, чтобы не терять browsable API, POST и OPTIONS.
+    """
+    drf_view, fallback = fallback, sync_to_async(fallback)
+
+    def decorator(handler):
+        async def view(request, *args, **kwargs):
+            if (request.method != 'GET'
+                    or 'text/html' in request.headers.get('Accept', '')):
+                return await fallback(request, *args, **kwargs)
+            try:
+                return await handler(
+                    await authenticate(request, drf_view, kwargs),
+                    *args, **kwargs
+                )
+            except APIException as exc:
+                return error_response(exc)
+        view.csrf_exempt = True
+        return view
+    return decorator
+
+
+@sync_to_async
+def filter_recipes(request, queryset):
+    """django-filter проверяет теги запросом к БД, поэтому в потоке."""
+    filterset = RecipeFilter(request.GET, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        return None, translate_validation(filterset.errors).detail
+    return filterset.qs, None
+
+
+async def paginate(request, queryset):
+    paginator = CustomPaginator()
+    pages = paginator.django_paginator_class(
+        queryset, paginator.get_page_size(request)
+    )
+    pages.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, pages)
+    try:
+        paginator.page = pages.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+    paginator.request = request
+    return paginator, [row async for row in paginator.page.object_list]
+
+
+@async_get(RecipeViewSet.as_view(
+    {'get': 'list', 'post': 'create'}, basename='recipes', detail=False,
+))
+async def recipe_list(request):
+    reader = await sync_to_async(RecipeReader)(request)
+    queryset, errors = await filter_recipes(request, Recipe.objects.for_read(
+        request.user, FieldSelection.from_request(request)
+    ))
+    if errors:
+        return json_response(errors, 400)
+    paginator, rows = await paginate(request, reader.rows(queryset))
+    return json_response(paginator.get_paginated_response(
+        await reader.aserialize(rows)
+    ).data)
+
+
+@async_get(RecipeViewSet.as_view({
+    'get': 'retrieve', 'put': 'update', 'patch': 'partial_update',
+    'delete': 'destroy',
+}, basename='recipes', detail=True))
+async def recipe_detail(request, pk):
+    reader = await sync_to_async(RecipeReader)(request)
+    rows = [row async for row in reader.rows(Recipe.objects.for_read(
+        request.user, FieldSelection.from_request(request)
+    ).filter(pk=pk))]
+    if not rows:
+        raise NotFound()
+    data, = await reader.aserialize(rows)
+    return json_response(data)
+
+
+@async_get(RecipeViewSet.as_view(
+    {'get': 'download_shopping_cart'}, basename='recipes',
+    **RecipeViewSet.download_shopping_cart.kwargs,
+))
+async def download_shopping_cart(request):
+    if not request.user.is_authenticated:
+        raise NotAuthenticated()
+    cart_id = cart_param(request)
+    if cart_id is not None and not await Cart.objects.filter(
+        pk=cart_id, user_id=request.user.id
+    ).aexists():
+        raise NotFound()
+    return shopping_list_response([
+        item async for item in shopping_list_items(request.user, cart_id)
+    ])
+
+
+def serialize_records(serializer_class, records):
+    serializer = compiled(serializer_class)
+    return [
+        serializer.function(
+            [getattr(record, name) for name in serializer.lookups],
+            None, None,
+        )
+        for record in records
+    ]
+
+
+@async_get(IngredientViewSet.as_view(
+    {'get': 'list'}, basename='ingridients', detail=False,
+))
+async def ingredient_list(request):
+    table = await sync_to_async(references.ingredients.table)()
+    return json_response(serialize_records(
+        IngredientSerializer,
+        ingredients_by_name(table.records, search_query(request)),
+    ))
+
+
+@async_get(TagViewSet.as_view(
+    {'get': 'list'}, basename='tags', detail=False,
+))
+async def tag_list(request):
+    table = await sync_to_async(references.tags.table)()
+    return json_response(serialize_records(TagSerializer, table.records))
+
+
+@async_get(EventListView.as_view())
+async def event_list(request):
+    """Ожидание новых событий без занятого потока."""
+    if not request.user.is_authenticated:
+        raise NotAuthenticated()
+    if not request.user.is_staff:
+        raise PermissionDenied()
+    since, limit, wait = event_params(request)
+    deadline = time.monotonic() + wait
+    while True:
+        await sync_to_async(publish)()
+        events = [event async for event in events_after(since, limit)]
+        if events or time.monotonic() >= deadline:
+            return json_response(events_page(events, since))
+        await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
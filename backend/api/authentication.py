@@ -0,0 +1,80 @@
+import copy
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+from .caching import LocalCache, is_shared
+
+token_cache = LocalCache(
+    'auth-tokens',
+    settings.AUTH_TOKEN_CACHE_SIZE,
+    settings.AUTH_TOKEN_CACHE_TTL,
+)
+
+
+def shared_key(key):
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к БД для известных токенов.
+
+    Пользователь по токену ищется в LRU-кэше процесса, затем (при
+    AUTH_TOKEN_SHARED_CACHE) в общем кэше и только потом в БД. Выход,
+    удаление токена (в том числе выход через djoser) и изменение
+    пользователя сбрасывают оба уровня после фиксации транзакции.
+    Каждый запрос получает свою копию пользователя из кэша.
+
+    Сброс доходит до других воркеров через общий кэш default, поэтому
+    с локальным кэшем (LocMemCache) оба уровня не используются: иначе
+    отозванный токен работал бы в других процессах до конца TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        if not is_shared():
+            return super().authenticate_credentials(key)
+        token_cache.sync()
+        user = token_cache.get(key)
+        if user is None and settings.AUTH_TOKEN_SHARED_CACHE:
+            user = cache.get(shared_key(key))
+            if user is not None:
+                token_cache.set(key, user)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, copy.copy(user))
+            if settings.AUTH_TOKEN_SHARED_CACHE:
+                cache.set(
+                    shared_key(key), user, settings.AUTH_TOKEN_CACHE_TTL
+                )
+            return user, token
+        user = copy.copy(user)
+        return user, Token(key=key, user=user)
+
+
+def invalidate_tokens(keys):
+    if settings.AUTH_TOKEN_SHARED_CACHE:
+        cache.delete_many([shared_key(key) for key in keys])
+    token_cache.invalidate()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    transaction.on_commit(partial(invalidate_tokens, [instance.key]))
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, created=False, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    keys = list(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+    transaction.on_commit(partial(invalidate_tokens, keys))
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+def is_shared(alias='default'):
+    """Кэш общий для всех процессов (не локальный и не заглушка)."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def require_shared(setting):
+    """Запрещает запуск с setting, если кэш default не общий."""
+    if not is_shared():
+        raise ImproperlyConfigured(
+            f'{setting} требует общего кэша (CACHE_BACKEND, например '
+            f'Redis): с локальным кэшем состояние видно только одному '
+            f'воркеру.'
+        )
+
+
+class VersionStamp:
+    """Номер версии данных в общем кэше для сброса локальных кэшей воркеров.
+
+    Запись увеличивает номер, а каждый процесс сравнивает его со своим
+    и сбрасывает локальные данные при расхождении.
+    """
+
+    def __init__(self, name):
+        self.key = f'version:{name}'
+
+    def get(self):
+        return cache.get_or_set(self.key, 1, None)
+
+    def bump(self):
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            cache.set(self.key, 2, None)
+            return 2
+
+
+class LocalCache:
+    """Потокобезопасный LRU-кэш процесса с TTL и общим номером версии.
+
+    sync() сверяет номер версии из общего кэша и очищает локальные
+    записи, если другой процесс вызвал invalidate().
+    """
+
+    def __init__(self, name, maxsize, ttl=None):
+        self.stamp = VersionStamp(name)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sync(self):
+        version = self.stamp.get()
+        if version != self.version:
+            with self._lock:
+                self._entries.clear()
+                self.version = version
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self):
+        self.stamp.bump()
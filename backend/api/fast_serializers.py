@@ -0,0 +1,215 @@
+from collections import defaultdict
+from functools import lru_cache, partial
+
+from django.conf import settings
+from rest_framework import serializers
+
+from recipes.models import Recipe, RecipeIngredient
+from users.models import User
+from .fieldsets import ALL_FIELDS, FieldSelection
+from .fragments import fragment_cache
+from .serializers import (RecipeGetSerializer, RecipeIngredientGetSerializer,
+                          TagSerializer, UserReadSerializer)
+
+
+class CompiledSerializer:
+    """Сериализатор DRF, скомпилированный в функцию над values_list.
+
+    Обычные поля читаются из кортежа по индексу (source 'a.b' -> 'a__b'),
+    SerializerMethodField — из одноимённой аннотации запроса, файловые
+    поля превращаются в URL через file_url. Вложенные сериализаторы и
+    списки ключей из nested берутся из словаря related: списки по
+    первичному ключу объекта, одиночные — по '<source>_id'. Набор полей
+    определяется FieldSelection так же, как в SparseFieldsMixin.
+    """
+
+    def __init__(self, serializer_class, prefix='', nested=(), leading=(),
+                 selection=ALL_FIELDS):
+        self.name = serializer_class.__name__
+        self.lookups = list(leading)
+        self.relations = {}
+        parts = []
+        serializer = serializer_class(context={'selection': selection})
+        for name, field in serializer.fields.items():
+            expression = self._expression(name, field, prefix, nested)
+            parts.append(f'{name!r}: {expression}')
+        source = (
+            'def serialize(row, related, file_url):\n'
+            f'    return {{{", ".join(parts)}}}\n'
+        )
+        namespace = {}
+        exec(compile(source, f'<compiled {self.name}>', 'exec'), namespace)
+        self.function = namespace['serialize']
+
+    def index(self, lookup):
+        return self.lookups.index(lookup)
+
+    def _slot(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.index(lookup)
+
+    def _expression(self, name, field, prefix, nested):
+        if name in nested and isinstance(
+                field, (serializers.BaseSerializer,
+                        serializers.ManyRelatedField)):
+            self.relations[name] = field
+            if isinstance(field, (serializers.ListSerializer,
+                                  serializers.ManyRelatedField)):
+                key = self._slot(f'{prefix}id')
+                return f'related[{name!r}].get(row[{key}]) or []'
+            key = self._slot(f'{prefix}{field.source}_id')
+            return f'related[{name!r}][row[{key}]]'
+        if isinstance(field, serializers.SerializerMethodField):
+            return f'row[{self._slot(prefix + name)}]'
+        if (isinstance(field, serializers.BaseSerializer)
+                or field.source == '*'):
+            raise TypeError(f'{self.name}.{name} нельзя скомпилировать')
+        position = self._slot(prefix + field.source.replace('.', '__'))
+        if isinstance(field, serializers.FileField):
+            return f'file_url(row[{position}])'
+        return f'row[{position}]'
+
+
+@lru_cache(maxsize=256)
+def compiled(serializer_class, prefix='', nested=(), leading=(),
+             selection=ALL_FIELDS):
+    return CompiledSerializer(
+        serializer_class, prefix, nested, leading, selection
+    )
+
+
+class RecipeReader:
+    """Чтение рецептов в формате RecipeGetSerializer без ModelSerializer.
+
+    Рецепты, теги, ингредиенты и авторы выбираются четырьмя запросами
+    values_list и собираются скомпилированными функциями. При
+    JSON_FRAGMENTS теги, ингредиенты и авторы вставляются в ответ
+    заранее закодированными фрагментами из fragment_cache.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.recipe = compiled(
+            RecipeGetSerializer, nested=('tags', 'author', 'ingredients'),
+            selection=FieldSelection.from_request(request),
+        )
+        self.tag = compiled(
+            TagSerializer, prefix='tag__', leading=('recipe_id',)
+        )
+        self.ingredient = compiled(
+            RecipeIngredientGetSerializer, leading=('recipe_id',)
+        )
+        self.author = compiled(UserReadSerializer, leading=('id',))
+        self.storage = Recipe._meta.get_field('image').storage
+        self.fragments = None
+        if settings.JSON_FRAGMENTS:
+            self.fragments = fragment_cache
+            self.fragments.sync()
+
+    def file_url(self, name):
+        if not name:
+            return None
+        return self.request.build_absolute_uri(self.storage.url(name))
+
+    def rows(self, queryset):
+        """Строки рецептов для пагинации вместо объектов модели."""
+        return queryset.prefetch_related(None).values_list(
+            *self.recipe.lookups
+        )
+
+    def represent(self, serializer, row, kind, pk, variant=None):
+        def build():
+            return serializer.function(row, None, self.file_url)
+        if self.fragments is None:
+            return build()
+        return self.fragments.get_or_build(kind, row[pk], variant, build)
+
+    def group(self, serializer, kind, pk, variant, rows):
+        pk = serializer.index(pk)
+        variant = serializer.index(variant) if variant else None
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row[0]].append(self.represent(
+                serializer, row, kind, pk,
+                None if variant is None else row[variant],
+            ))
+        return grouped
+
+    @staticmethod
+    def group_ids(rows):
+        grouped = defaultdict(list)
+        for recipe_id, related_id in rows:
+            grouped[recipe_id].append(related_id)
+        return grouped
+
+    def index_authors(self, rows):
+        is_subscribed = self.author.index('is_subscribed')
+        return {
+            row[0]: self.represent(
+                self.author, row, 'user', 0, row[is_subscribed]
+            )
+            for row in rows
+        }
+
+    def related_queries(self, rows):
+        """Запросы связей страницы: имя -> (values_list, сборка)."""
+        relations = self.recipe.relations
+        queries = {}
+        ids = []
+        if 'tags' in relations or 'ingredients' in relations:
+            pk = self.recipe.index('id')
+            ids = [row[pk] for row in rows]
+        if 'tags' in relations:
+            tags = Recipe.tags.through.objects.filter(
+                recipe_id__in=ids
+            ).order_by('tag_id')
+            if isinstance(relations['tags'], serializers.ManyRelatedField):
+                queries['tags'] = (
+                    tags.values_list('recipe_id', 'tag_id'), self.group_ids
+                )
+            else:
+                queries['tags'] = (
+                    tags.values_list(*self.tag.lookups),
+                    partial(self.group, self.tag, 'tag', 'tag__id', None),
+                )
+        if 'ingredients' in relations:
+            queries['ingredients'] = (
+                RecipeIngredient.objects.filter(
+                    recipe_id__in=ids
+                ).order_by('id').values_list(*self.ingredient.lookups),
+                partial(self.group, self.ingredient, 'ingredient',
+                        'ingredient__id', 'amount'),
+            )
+        if 'author' in relations:
+            author = self.recipe.index('author_id')
+            queries['author'] = (
+                User.objects.filter(
+                    id__in={row[author] for row in rows}
+                ).with_is_subscribed(
+                    self.request.user
+                ).values_list(*self.author.lookups),
+                self.index_authors,
+            )
+        return queries
+
+    def build(self, rows, related):
+        return [
+            self.recipe.function(row, related, self.file_url)
+            for row in rows
+        ]
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = {
+            name: build(list(queryset))
+            for name, (queryset, build) in self.related_queries(rows).items()
+        }
+        return self.build(rows, related)
+
+    async def aserialize(self, rows):
+        """serialize() для async-представлений: rows уже список."""
+        related = {}
+        for name, (queryset, build) in self.related_queries(rows).items():
+            related[name] = build([row async for row in queryset])
+        return self.build(rows, related)
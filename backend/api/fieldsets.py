@@ -0,0 +1,92 @@
+from rest_framework import serializers
+
+
+def split(value):
+    if not value:
+        return None
+    return tuple(sorted(
+        {name.strip() for name in value.split(',') if name.strip()}
+    ))
+
+
+class FieldSelection:
+    """Выбор полей ответа из параметров ?fields=, ?omit= и ?expand=.
+
+    fields оставляет только перечисленные поля, omit убирает поля,
+    expand перечисляет связи, которые вкладываются целиком; остальные
+    связи из expandable сериализатора отдаются первичными ключами.
+    Без параметров ответ не меняется.
+    """
+
+    __slots__ = ('fields', 'omit', 'expand')
+
+    def __init__(self, fields=None, omit=None, expand=None):
+        self.fields = fields
+        self.omit = omit or ()
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None:
+            return ALL_FIELDS
+        params = getattr(request, 'query_params', request.GET)
+        selection = cls(
+            split(params.get('fields')),
+            split(params.get('omit')),
+            split(params.get('expand')),
+        )
+        return ALL_FIELDS if selection == ALL_FIELDS else selection
+
+    @classmethod
+    def from_context(cls, context):
+        if 'selection' in context:
+            return context['selection']
+        return cls.from_request(context.get('request'))
+
+    def wants(self, name):
+        return ((self.fields is None or name in self.fields)
+                and name not in self.omit)
+
+    def expanded(self, name):
+        return self.expand is None or name in self.expand
+
+    def _key(self):
+        return self.fields, self.omit, self.expand
+
+    def __eq__(self, other):
+        return (isinstance(other, FieldSelection)
+                and self._key() == other._key())
+
+    def __hash__(self):
+        return hash(self._key())
+
+
+ALL_FIELDS = FieldSelection()
+
+
+class SparseFieldsMixin:
+    """Сокращает поля корневого сериализатора по FieldSelection запроса.
+
+    Связи из expandable, не перечисленные в ?expand=, заменяются
+    первичными ключами. Вложенные сериализаторы не меняются.
+    """
+
+    expandable = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selection = FieldSelection.from_context(self.context)
+        if selection == ALL_FIELDS:
+            return
+        for name, field in list(self.fields.items()):
+            if not selection.wants(name):
+                del self.fields[name]
+            elif name in self.expandable and not selection.expanded(name):
+                source = {} if field.source == name else {
+                    'source': field.source
+                }
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True,
+                    many=isinstance(field, serializers.ListSerializer),
+                    **source,
+                )
@@ -1,43 +1,214 @@
+from itertools import islice
+
+from django import forms
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.db.models.lookups import Exact, GreaterThan
 from django_filters import rest_framework as filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (Favorite, Ingredient, MealPlan, Recipe,
+                            RecipeIngredient, ShoppingCart)
+from . import references
+from .params import check_values
+
+# Число битов маски, до которого фильтр перечисляет подходящие маски
+# для IN по индексу tags_mask, а не проверяет пересечение битов.
+ENUMERATED_MASK_BITS = 8
+
+
+def intersecting_masks(used, wanted):
+    """Все подмаски used, в которых есть хотя бы один бит из wanted."""
+    mask = used
+    while mask:
+        if mask & wanted:
+            yield mask
+        mask = (mask - 1) & used
+
+
+def disjoint_masks(used, wanted):
+    """Все подмаски used, включая 0, без битов из wanted."""
+    mask = used & ~wanted
+    free = mask
+    while True:
+        yield mask
+        if not mask:
+            return
+        mask = (mask - 1) & free
+
+
+class TagSlugField(forms.MultipleChoiceField):
+
+    def validate(self, value):
+        references.tags.resolve('slug', value)
+        super().validate(value)
+
+
+class TagMaskFilter(filters.MultipleChoiceFilter):
+    """Рецепты хотя бы с одним из тегов по Recipe.tags_mask.
+
+    Пока тегов с битами не больше ENUMERATED_MASK_BITS, условие — IN по
+    индексу tags_mask без соединения со связующей таблицей и DISTINCT.
+    С exclude=True — рецепты без этих тегов.
+    """
+
+    field_class = TagSlugField
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', lambda: [
+            (tag.slug, tag.slug) for tag in references.tags.table().records
+        ])
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        table = references.tags.table()
+        tags = [table.find('slug', slug) for slug in value]
+        if any(tag.mask is None for tag in tags):
+            tagged = Recipe.tags.through.objects.filter(
+                tag_id__in=[tag.id for tag in tags]
+            )
+            if self.exclude:
+                return qs.filter(~Exists(tagged.filter(recipe=OuterRef('pk'))))
+            return qs.filter(pk__in=tagged.values('recipe_id'))
+        wanted = 0
+        for tag in tags:
+            wanted |= tag.mask
+        used = 0
+        for tag in table.records:
+            used |= tag.mask or 0
+        if bin(used).count('1') <= ENUMERATED_MASK_BITS:
+            masks = (disjoint_masks if self.exclude
+                     else intersecting_masks)(used, wanted)
+            return qs.filter(tags_mask__in=list(masks))
+        common = F('tags_mask').bitand(wanted)
+        if self.exclude:
+            return qs.filter(Exact(common, 0))
+        return qs.filter(GreaterThan(common, 0))
+
+
+class IdInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Список id через запятую."""
+
+    field_class = forms.IntegerField
+
+    def filter(self, qs, value):
+        check_values(self.field_name, value)
+        return super().filter(qs, value)
+
+
+class IngredientsFilter(IdInFilter):
+    """Рецепты по id ингредиентов без JOIN и DISTINCT.
+
+    match: all — со всеми ингредиентами, any — хотя бы с одним (IN по
+    подзапросу к индексу ингредиент-рецепт), none — ни с одним (NOT
+    EXISTS).
+    """
+
+    def __init__(self, *args, match='all', **kwargs):
+        self.match = match
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        check_values(self.field_name, value)
+
+        def recipes(ids):
+            return RecipeIngredient.objects.filter(ingredient_id__in=ids)
+
+        if self.match == 'all':
+            for pk in set(value):
+                qs = qs.filter(pk__in=recipes([pk]).values('recipe_id'))
+            return qs
+        if self.match == 'none':
+            return qs.filter(
+                ~Exists(recipes(value).filter(recipe=OuterRef('pk')))
+            )
+        return qs.filter(pk__in=recipes(value).values('recipe_id'))
 
 
 class RecipeFilter(filters.FilterSet):
-    """Фильтрация по избранному, автору, списку покупок и тегам."""
+    """Фильтрация рецептов.
+
+    Условия на связи — полусоединения (IN по подзапросу, NOT EXISTS),
+    поэтому строки рецептов не размножаются и DISTINCT не нужен.
+    """
 
     is_favorited = filters.BooleanFilter(
         method='get_favorite',
     )
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all()
-    )
+    tags = TagMaskFilter()
+    exclude_tags = TagMaskFilter(field_name='tags', exclude=True)
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart',
     )
+    author__in = IdInFilter(field_name='author', lookup_expr='in')
+    cooking_time__gte = filters.NumberFilter(field_name='cooking_time',
+                                             lookup_expr='gte')
+    cooking_time__lte = filters.NumberFilter(field_name='cooking_time',
+                                             lookup_expr='lte')
+    ingredients = IngredientsFilter(match='all')
+    ingredients_any = IngredientsFilter(match='any')
+    exclude_ingredients = IngredientsFilter(match='none')
+    max_kcal = filters.NumberFilter(field_name='kcal', lookup_expr='lte')
 
     class Meta:
         model = Recipe
         fields = (
             'tags',
+            'exclude_tags',
             'author',
+            'author__in',
             'is_favorited',
             'is_in_shopping_cart',
+            'cooking_time__gte',
+            'cooking_time__lte',
+            'ingredients',
+            'ingredients_any',
+            'exclude_ingredients',
+            'max_kcal',
         )
 
     def get_favorite(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(pk__in=Favorite.objects.filter(
+                user_id=self.request.user.id
+            ).values('recipe_id'))
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(shopping_list__user=self.request.user)
+            return queryset.filter(pk__in=ShoppingCart.objects.filter(
+                user_id=self.request.user.id
+            ).values('recipe_id'))
         return queryset
 
 
+class MealPlanFilter(filters.FilterSet):
+    """Записи плана питания за даты с start по end."""
+
+    start = filters.DateFilter(field_name='date', lookup_expr='gte')
+    end = filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = MealPlan
+        fields = ('start', 'end')
+
+
+def ingredients_by_name(records, name):
+    """Поиск IngredientFilter по записям справочника ингредиентов.
+
+    Отдаётся не больше INGREDIENT_LIST_LIMIT записей, в том числе
+    без названия.
+    """
+    if name:
+        prefix = name.upper()
+        records = (record for record in records
+                   if record.name.upper().startswith(prefix))
+    return list(islice(records, settings.INGREDIENT_LIST_LIMIT))
+
+
 class IngredientFilter(filters.FilterSet):
     """Фильтр ингредиентов"""
 
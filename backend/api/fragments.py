@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+from .caching import LocalCache
+from .renderers import Fragment, encode
+
+PUBLIC_USER_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+class FragmentCache(LocalCache):
+    """LRU-кэш JSON-фрагментов неизменяемых подобъектов ответа.
+
+    Ключ — вид объекта, его pk и вариант представления (например, автор
+    с is_subscribed true и false). Любое изменение исходных моделей
+    после фиксации транзакции сбрасывает кэш во всех воркерах.
+    """
+
+    def get_or_build(self, kind, pk, variant, build):
+        key = (kind, pk, variant)
+        fragment = self.get(key)
+        if fragment is None:
+            fragment = Fragment(encode(build()))
+            self.set(key, fragment)
+        return fragment
+
+
+fragment_cache = FragmentCache('fragments', settings.FRAGMENT_CACHE_SIZE)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_reference_fragments(created=False, **kwargs):
+    if not created:
+        transaction.on_commit(fragment_cache.invalidate)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_user_fragments(created=False, update_fields=None, **kwargs):
+    if created or (update_fields
+                   and not PUBLIC_USER_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(fragment_cache.invalidate)
@@ -0,0 +1,74 @@
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import PROFILE_SUFFIX, load_stacks
+
+CATEGORIES = (
+    ('db', ('django.db.backends', 'psycopg2')),
+    ('orm', ('django.db.models',)),
+    ('filtering', ('django_filters', 'api.filters')),
+    ('serialization', ('rest_framework.serializers', 'rest_framework.fields',
+                       'rest_framework.relations', 'drf_extra_fields',
+                       'api.serializers')),
+    ('rendering', ('rest_framework.renderers', 'json')),
+    ('auth', ('rest_framework.authentication', 'rest_framework.permissions',
+              'api.permissions')),
+)
+
+
+def categorize(stack):
+    """Категория по ближайшему к вершине стека известному модулю."""
+    for name in reversed(stack.split(';')):
+        for category, prefixes in CATEGORIES:
+            if name.startswith(prefixes):
+                return category
+    return 'other'
+
+
+class Command(BaseCommand):
+    help = '''Сведение сэмплов профилирования по эндпоинтам.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.PROFILING_DIR)
+        parser.add_argument('--endpoint', default=None)
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        root = Path(options['dir'])
+        if not root.is_dir():
+            raise CommandError(f'Каталог {root} не найден')
+        for directory in sorted(path for path in root.iterdir()
+                                if path.is_dir()):
+            if options['endpoint'] not in (None, directory.name):
+                continue
+            stacks = Counter()
+            files = sorted(directory.glob(f'*{PROFILE_SUFFIX}'))
+            for path in files:
+                stacks.update(load_stacks(path))
+            if not stacks:
+                continue
+            self.report(directory.name, len(files), stacks, options['top'])
+            output = root / f'{directory.name}{PROFILE_SUFFIX}'
+            with open(output, 'w', encoding='utf-8') as file:
+                for stack, count in stacks.most_common():
+                    file.write(f'{stack} {count}\n')
+            self.stdout.write(self.style.SUCCESS(f'Стеки сохранены: {output}'))
+
+    def report(self, endpoint, requests, stacks, top):
+        total = sum(stacks.values())
+        self.stdout.write(
+            f'{endpoint}: {requests} запросов, {total} сэмплов'
+        )
+        categories = Counter()
+        leaves = Counter()
+        for stack, count in stacks.items():
+            categories[categorize(stack)] += count
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        for category, count in categories.most_common():
+            self.stdout.write(f'  {category:<14} {count / total:6.1%}')
+        self.stdout.write('  Самые горячие функции:')
+        for name, count in leaves.most_common(top):
+            self.stdout.write(f'  {count / total:6.1%} {name}')
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = '''Замер накладных расходов на соединение с БД за запрос.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--pool-size', type=int, default=4)
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        if alias not in connections:
+            raise CommandError(f'Нет базы данных {alias}')
+        settings_dict = connections[alias].settings_dict
+        results = [
+            (name, self.measure(alias, settings_dict, overrides,
+                                options['requests']))
+            for name, overrides in self.modes(settings_dict, options)
+        ]
+        baseline = results[0][1][0]
+        self.stdout.write(
+            f'{options["requests"]} запросов, мс на запрос '
+            f'(среднее / p95 / относительно первого режима)'
+        )
+        for name, (mean, p95) in results:
+            self.stdout.write(
+                f'{name:<34} {mean * 1e3:7.3f} / {p95 * 1e3:7.3f} / '
+                f'{mean / baseline:5.2f}'
+            )
+
+    def modes(self, settings_dict, options):
+        yield 'новое соединение на запрос', {'CONN_MAX_AGE': 0}
+        yield 'постоянное соединение', {
+            'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': False,
+        }
+        yield 'постоянное + health checks', {
+            'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True,
+        }
+        if connections[options['database']].vendor != 'postgresql':
+            self.stdout.write('Пул соединений доступен только для PostgreSQL')
+            return
+        yield 'пул psycopg2', {
+            'ENGINE': 'foodgram.postgres_pool', 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'POOL_SIZE': options['pool_size'],
+        }
+        yield 'пул psycopg2 + health checks', {
+            'ENGINE': 'foodgram.postgres_pool', 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True, 'POOL_SIZE': options['pool_size'],
+        }
+
+    def measure(self, alias, settings_dict, overrides, requests):
+        """Цикл запроса Django: проверка соединения, запрос, закрытие."""
+        settings_dict = {**settings_dict, **overrides}
+        connection = load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+            settings_dict, f'{alias}-bench'
+        )
+        timings = []
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                connection.close_if_unusable_or_obsolete()
+                timings.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+        return sum(timings) / len(timings), percentile(timings, 0.95)
@@ -0,0 +1,95 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import RecipeReader
+from api.renderers import FastJSONRenderer
+from api.sample_data import populate, rolled_back
+from api.serializers import RecipeGetSerializer
+from recipes.models import Recipe
+
+
+def cpu_time(function, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = function()
+    return (time.process_time() - start) / repeat, result
+
+
+class Command(BaseCommand):
+    help = '''Сверка и замер скомпилированного чтения рецептов с DRF.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--ingredients', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        results = []
+        with rolled_back():
+            viewer = populate(options['recipes'], options['ingredients'])
+            request = Request(APIRequestFactory().get('/api/recipes/'))
+            request.user = viewer
+            recipes = Recipe.objects.filter(
+                author__username__startswith='sample_author_'
+            )
+            for name, build, renderer in self.variants(
+                    viewer, request, recipes):
+                total, content = cpu_time(
+                    lambda: renderer.render(build()), repeat
+                )
+                data = build()
+                rendering, _ = cpu_time(lambda: renderer.render(data), repeat)
+                results.append((name, total, rendering, content))
+        expected = json.loads(results[0][3])
+        for name, _, _, content in results[1:]:
+            self.check_parity(name, expected, json.loads(content))
+        count = len(expected)
+        self.stdout.write(
+            f'Рецептов на странице: {count}, CPU в мкс на рецепт '
+            f'(всего / из них рендеринг)'
+        )
+        for name, total, rendering, _ in results:
+            self.stdout.write(
+                f'{name:<30} {total / count * 1e6:8.1f} / '
+                f'{rendering / count * 1e6:6.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS('Результаты совпадают'))
+
+    def variants(self, viewer, request, recipes):
+        def drf():
+            return RecipeGetSerializer(
+                recipes.for_read(viewer), many=True,
+                context={'request': request},
+            ).data
+
+        def compiled(fragments):
+            with override_settings(JSON_FRAGMENTS=fragments):
+                reader = RecipeReader(request)
+            return lambda: reader.serialize(
+                reader.rows(recipes.with_user_flags(viewer))
+            )
+
+        yield 'DRF + JSONRenderer', drf, JSONRenderer()
+        yield 'DRF + FastJSONRenderer', drf, FastJSONRenderer()
+        yield 'compiled + orjson', compiled(False), FastJSONRenderer()
+        yield 'compiled + fragments', compiled(True), FastJSONRenderer()
+
+    def check_parity(self, name, expected, actual):
+        if len(expected) != len(actual):
+            raise CommandError(
+                f'{name}: {len(actual)} рецептов вместо {len(expected)}'
+            )
+        for left, right in zip(expected, actual):
+            if left != right:
+                raise CommandError(
+                    f'{name}: рецепт {left.get("id")} отличается:\n'
+                    f'DRF: {left}\n{name}: {right}'
+                )
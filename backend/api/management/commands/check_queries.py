@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import meal_plans, references
+from api.query_guard import QueryRecorder, ScaleReport
+from api.sample_data import populate, rolled_back
+from api.tokens import add_claims
+from recipes.constants import MAX_PLAN_DAYS
+from api.urls import router
+
+
+# Параметры с цифрой не из ASCII ('²'): str.isdigit() её принимает,
+# а int() нет, ответ должен быть 400, а не 500.
+BAD_PARAMS = (
+    ('recipes-list', 'limit', '²'),
+    ('recipes-download-shopping-cart', 'cart', '²'),
+    ('users-subscriptions', 'recipes_limit', '²'),
+    ('sync', 'since', '²'),
+    ('sync', 'limit', '²'),
+    ('sync', 'cursor', '1.²'),
+    ('events', 'since', '²'),
+    ('events', 'limit', '²'),
+)
+
+
+def route_params(name):
+    """Параметры запроса, без которых эндпоинт отвечает 400."""
+    params = {'limit': settings.MAX_PAGE_SIZE}
+    if name == 'meal_plan-shopping-list':
+        params['start'] = date.today()
+        params['end'] = date.today() + timedelta(days=MAX_PLAN_DAYS - 1)
+    elif name == 'users-subscriptions':
+        params['recipes_limit'] = settings.MAX_RECIPES_LIMIT
+    return params
+
+
+def endpoints():
+    """GET-адреса всех эндпоинтов роутера api."""
+    for prefix, viewset, basename in router.registry:
+        model = viewset.queryset.model
+        routes = [('list', False), ('detail', True)]
+        routes += [
+            (extra.url_name, extra.detail)
+            for extra in viewset.get_extra_actions()
+            if 'get' in extra.mapping
+        ]
+        for url_name, detail in routes:
+            yield f'{basename}-{url_name}', model, detail
+
+
+def resolve(name, model, detail):
+    kwargs = {}
+    if detail:
+        obj = model.objects.order_by('pk').last()
+        if obj is None:
+            return None
+        kwargs['pk'] = obj.pk
+    try:
+        return reverse(f'api:{name}', kwargs=kwargs)
+    except NoReverseMatch:
+        if not detail:
+            return None
+        return reverse(f'api:{name}', kwargs={'id': kwargs['pk']})
+
+
+def measure(scale, jwt=False):
+    """Число запросов каждого эндпоинта на наборе данных заданного объёма.
+
+    jwt — запросы от TokenUser, как при JWT_AUTH_ENABLED на чтение.
+    """
+    recorders = {}
+    with rolled_back():
+        viewer = populate(scale)
+        # Данные созданы bulk_create без сигналов, а сброс кэшей после
+        # фиксации в откатываемой транзакции не срабатывает: снимки
+        # справочников и списки покупок прошлого прогона к ним не относятся.
+        references.tags.invalidate()
+        references.ingredients.invalidate()
+        meal_plans.shared.bump()
+        client = APIClient()
+        if jwt:
+            token = add_claims(AccessToken.for_user(viewer), viewer)
+            viewer = TokenUser(token)
+        client.force_authenticate(viewer)
+        for name, model, detail in endpoints():
+            url = resolve(name, model, detail)
+            if url is None:
+                continue
+            with QueryRecorder() as recorder:
+                response = client.get(url, route_params(name))
+            if not 200 <= response.status_code < 300:
+                raise CommandError(f'{url} вернул {response.status_code}')
+            recorders[f'jwt: {name}' if jwt else name] = recorder
+    return recorders
+
+
+def check_bad_params():
+    """Неверные числовые параметры дают 400 на каждом эндпоинте."""
+    with rolled_back():
+        viewer = populate(1)
+        viewer.is_staff = True
+        client = APIClient()
+        client.force_authenticate(viewer)
+        for name, param, value in BAD_PARAMS:
+            url = reverse(f'api:{name}')
+            response = client.get(url, {param: value})
+            if response.status_code != 400:
+                raise CommandError(
+                    f'{url}?{param}={value} вернул {response.status_code}'
+                )
+
+
+class Command(BaseCommand):
+    help = '''Проверка эндпоинтов api на рост числа запросов (N+1).'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=3)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'], THROTTLE_ENABLED=False)
+    def handle(self, *args, **options):
+        scale = options['scale']
+        check_bad_params()
+        small = {**measure(scale), **measure(scale, jwt=True)}
+        large = {**measure(scale * 2), **measure(scale * 2, jwt=True)}
+        failed = False
+        for name, recorder in small.items():
+            report = ScaleReport(name, recorder, large.get(name, recorder))
+            if report.failed:
+                failed = True
+                self.stderr.write(report.format())
+            else:
+                self.stdout.write(
+                    f'{report.name}: {len(report.small)} запросов'
+                )
+        if failed:
+            raise CommandError('Число запросов растёт вместе с данными')
+        self.stdout.write(self.style.SUCCESS('Рост числа запросов не найден'))
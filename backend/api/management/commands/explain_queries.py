@@ -0,0 +1,137 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.sample_data import populate, rolled_back
+from api.sync import encode_token
+from recipes.models import Cart, Recipe
+
+SCANS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'^SCAN (\w+)$'),
+}
+# Производные таблицы (COUNT поверх DISTINCT, оконная функция среза
+# в prefetch) просматриваются целиком по построению.
+DERIVED = {'subquery', 'qualify'}
+
+
+def scenarios():
+    """Адреса с фильтрами RecipeFilter и сериализаторами чтения.
+
+    Последний элемент — таблицы, которые список без фильтров
+    просматривает целиком.
+    """
+    recipe = Recipe.objects.order_by('pk').last()
+    recipes = reverse('api:recipes-list')
+    yield 'рецепты', recipes, {}, {'recipes_recipe'}
+    yield 'рецепты: избранное', recipes, {'is_favorited': 1}, set()
+    yield 'рецепты: корзина', recipes, {'is_in_shopping_cart': 1}, set()
+    yield 'рецепты: тег', recipes, {'tags': 'sample-0'}, set()
+    yield 'рецепты: автор', recipes, {'author': recipe.author_id}, set()
+    yield 'рецепты: калорийность', recipes, {'max_kcal': 500}, set()
+    yield ('рецепты: время', recipes,
+           {'cooking_time__gte': 2, 'cooking_time__lte': 3}, set())
+    authors = Recipe.objects.values_list('author_id', flat=True)[:2]
+    yield ('рецепты: авторы', recipes,
+           {'author__in': ','.join(map(str, authors))}, set())
+    ingredients = ','.join(map(str, recipe.recipe_ingredients.values_list(
+        'ingredient_id', flat=True
+    )))
+    yield ('рецепты: все ингредиенты', recipes, {'ingredients': ingredients},
+           set())
+    yield ('рецепты: любой ингредиент', recipes,
+           {'ingredients_any': ingredients}, set())
+    yield ('рецепты: без ингредиентов', recipes,
+           {'exclude_ingredients': ingredients}, {'recipes_recipe'})
+    yield 'рецепты: без тега', recipes, {'exclude_tags': 'sample-0'}, set()
+    yield ('рецепты: вторая страница', recipes, {'page': 2, 'limit': 1},
+           {'recipes_recipe'})
+    yield ('рецепт', reverse('api:recipes-detail', args=[recipe.pk]), {},
+           set())
+    yield ('список покупок', reverse('api:recipes-download-shopping-cart'),
+           {}, set())
+    yield ('список покупок: корзина',
+           reverse('api:recipes-download-shopping-cart'),
+           {'cart': Cart.objects.order_by('pk').last().pk}, set())
+    period = {'start': date.today(), 'end': date.today() + timedelta(30)}
+    yield 'план питания', reverse('api:meal_plan-list'), period, set()
+    yield ('план питания: список покупок',
+           reverse('api:meal_plan-shopping-list'), period, set())
+    yield 'подписки', reverse('api:users-subscriptions'), {}, set()
+    yield 'пользователи', reverse('api:users-list'), {}, {'users_user'}
+    yield ('ингредиенты', reverse('api:ingridients-list'), {'name': 'sam'},
+           set())
+    yield 'синхронизация', reverse('api:sync'), {}, set()
+    yield ('синхронизация: изменения', reverse('api:sync'),
+           {'since': encode_token(timezone.now() - timedelta(1))}, set())
+
+
+def explain(cursor, sql):
+    if connection.vendor == 'postgresql':
+        cursor.execute('EXPLAIN ' + sql)
+        return [row[0] for row in cursor.fetchall()]
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = '''EXPLAIN запросов фильтров и сериализаторов api.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=20)
+        parser.add_argument(
+            '--ignore', nargs='*', default=['recipes_tag'],
+            help='Таблицы, полный просмотр которых допустим'
+        )
+        parser.add_argument('--plans', action='store_true',
+                            help='Выводить планы целиком')
+        parser.add_argument('--fail', action='store_true',
+                            help='Ошибка при найденных полных просмотрах')
+
+    @override_settings(ALLOWED_HOSTS=['testserver'], THROTTLE_ENABLED=False)
+    def handle(self, *args, **options):
+        scan = SCANS.get(connection.vendor)
+        if scan is None:
+            raise CommandError(f'EXPLAIN для {connection.vendor} не настроен')
+        flagged = 0
+        with rolled_back():
+            viewer = populate(options['scale'])
+            client = APIClient()
+            client.force_authenticate(viewer)
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    # Полный просмотр остаётся только там, где нет
+                    # подходящего индекса, а не из-за малого объёма.
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                for name, url, params, listed in scenarios():
+                    with CaptureQueriesContext(connection) as queries:
+                        client.get(url, params)
+                    self.stdout.write(f'{name}: {len(queries)} запросов')
+                    for query in queries.captured_queries:
+                        flagged += self.report(
+                            cursor, query['sql'], scan,
+                            {*options['ignore'], *listed, *DERIVED}, options
+                        )
+        if flagged and options['fail']:
+            raise CommandError(f'Полных просмотров таблиц: {flagged}')
+        self.stdout.write(f'Полных просмотров таблиц: {flagged}')
+
+    def report(self, cursor, sql, scan, allowed, options):
+        plan = explain(cursor, sql)
+        tables = [
+            match.group(1) for match in map(scan.search, plan)
+            if match and match.group(1) not in allowed
+        ]
+        if options['plans']:
+            self.stdout.write(f'  {sql}\n    ' + '\n    '.join(plan))
+        for table in tables:
+            self.stdout.write(self.style.WARNING(
+                f'  полный просмотр {table}: {sql[:160]}'
+            ))
+        return len(tables)
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    """Клиент отправляет запрос частями с паузой --send-delay и читает
+    ответ блоками по --chunk байт с паузой --read-delay, занимая
+    соединение, как медленная мобильная сеть. Один и тот же запуск
+    против gunicorn с WSGI и с ASGI (uvicorn) сравнивает пропускную
+    способность развёртываний.
+    """
+
+    help = '''Нагрузка на запущенный сервер медленными клиентами.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--send-delay', type=float, default=0.0)
+        parser.add_argument('--read-delay', type=float, default=0.0)
+        parser.add_argument('--chunk', type=int, default=1024)
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument(
+            '--header', action='append', default=[],
+            help='Дополнительный заголовок, например "Authorization: Token …"'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Поддерживается только http://')
+        self.options = options
+        self.host = url.hostname
+        self.port = url.port or 80
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+        lines = [f'GET {path} HTTP/1.1', f'Host: {url.netloc}',
+                 'Connection: close', *options['header']]
+        self.request = ('\r\n'.join(lines) + '\r\n\r\n').encode()
+        started = time.perf_counter()
+        results = asyncio.run(self.run())
+        elapsed = time.perf_counter() - started
+        timings = [timing for _, timing in results if timing is not None]
+        statuses = Counter(status for status, _ in results)
+        self.stdout.write(
+            f'{len(results)} запросов за {elapsed:.2f} с, '
+            f'{len(results) / elapsed:.1f} запросов/с'
+        )
+        if timings:
+            self.stdout.write(
+                f'Время ответа, мс: p50 {percentile(timings, 0.5) * 1e3:.1f}'
+                f', p95 {percentile(timings, 0.95) * 1e3:.1f}'
+                f', max {max(timings) * 1e3:.1f}'
+            )
+        self.stdout.write('Статусы: ' + ', '.join(
+            f'{status}: {count}' for status, count in sorted(
+                statuses.items(), key=lambda item: str(item[0])
+            )
+        ))
+
+    async def run(self):
+        queue = asyncio.Queue()
+        for _ in range(self.options['requests']):
+            queue.put_nowait(None)
+        results = []
+
+        async def client():
+            while not queue.empty():
+                queue.get_nowait()
+                results.append(await self.fetch())
+
+        await asyncio.gather(*(
+            client() for _ in range(self.options['concurrency'])
+        ))
+        return results
+
+    async def fetch(self):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                self.exchange(), self.options['timeout']
+            ), time.perf_counter() - started
+        except (OSError, asyncio.TimeoutError) as error:
+            return type(error).__name__, None
+
+    async def exchange(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.options['send_delay']:
+                half = len(self.request) // 2
+                writer.write(self.request[:half])
+                await writer.drain()
+                await asyncio.sleep(self.options['send_delay'])
+                writer.write(self.request[half:])
+            else:
+                writer.write(self.request)
+            await writer.drain()
+            status = None
+            while True:
+                data = await reader.read(self.options['chunk'])
+                if not data:
+                    break
+                if status is None:
+                    status = int(data.split(b' ', 2)[1])
+                if self.options['read_delay']:
+                    await asyncio.sleep(self.options['read_delay'])
+            return status
+        finally:
+            writer.close()
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (Ingredient, MealPlan, Recipe, RecipeIngredient,
+                            UnitConversion)
+from users.models import User
+from .caching import VersionStamp
+
+# Ингредиенты и переводы единиц меняют списки всех пользователей.
+shared = VersionStamp('meal_plan')
+
+
+def user_stamp(user_id):
+    return VersionStamp(f'meal_plan:{user_id}')
+
+
+def shopping_list(user, start, end):
+    """Список покупок плана питания за даты с start по end.
+
+    Результат хранится в общем кэше по (пользователь, период) до
+    изменения записей плана, рецептов из него, ингредиентов или
+    переводов единиц, но не дольше MEAL_PLAN_CACHE_TTL.
+    """
+    key = (f'meal_plan:{user.id}:{shared.get()}:'
+           f'{user_stamp(user.id).get()}:{start}:{end}')
+    items = cache.get(key)
+    if items is None:
+        items = list(RecipeIngredient.objects.totals(
+            'meal_plans', user_id=user.id, date__range=(start, end),
+        ))
+        cache.set(key, items, settings.MEAL_PLAN_CACHE_TTL)
+    return items
+
+
+def invalidate_plans(**lookups):
+    def bump():
+        for user_id in MealPlan.objects.filter(
+            **lookups
+        ).values_list('user_id', flat=True).distinct():
+            user_stamp(user_id).bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_recipe(recipe_id):
+    invalidate_plans(recipe_id=recipe_id)
+
+
+@receiver((post_save, post_delete), sender=MealPlan)
+def invalidate_plan(instance, **kwargs):
+    transaction.on_commit(user_stamp(instance.user_id).bump)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_planned_recipe(instance, **kwargs):
+    invalidate_recipe(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_deleted_author(instance, update_fields=None, **kwargs):
+    """Рецепты удалённого пользователя помечаются без сигналов."""
+    if update_fields and 'deleted_at' in update_fields:
+        invalidate_plans(recipe__author_id=instance.pk)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def invalidate_recipe_ingredient(instance, **kwargs):
+    invalidate_recipe(instance.recipe_id)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=UnitConversion)
+def invalidate_units(**kwargs):
+    transaction.on_commit(shared.bump)
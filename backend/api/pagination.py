@@ -1,5 +1,13 @@
+from django.conf import settings
 from rest_framework.pagination import PageNumberPagination
 
+from .params import int_param
+
 
 class CustomPaginator(PageNumberPagination):
     page_size_query_param = 'limit'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def get_page_size(self, request):
+        return int_param(request, self.page_size_query_param,
+                         self.max_page_size, self.page_size, minimum=1)
@@ -0,0 +1,50 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+
+def parse_int(value):
+    """Неотрицательное целое из ASCII-цифр или None.
+
+    str.isdigit() принимает и другие цифры Unicode ('²'), на которых
+    int() падает, поэтому строка сначала проверяется на ASCII.
+    """
+    if value and value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+
+def int_param(request, name, maximum, default=None, minimum=0):
+    """Целый параметр запроса от minimum до maximum, иначе 400."""
+    value = request.query_params.get(name) if request is not None else None
+    if value is None or value == '':
+        return default
+    number = parse_int(value)
+    if number is None or not minimum <= number <= maximum:
+        raise ValidationError({name: [
+            f'Ожидается целое число от {minimum} до {maximum}.'
+        ]})
+    return number
+
+
+def recipes_limit(request):
+    """Число рецептов автора в подписках, по умолчанию максимальное."""
+    return int_param(request, 'recipes_limit', settings.MAX_RECIPES_LIMIT,
+                     settings.MAX_RECIPES_LIMIT)
+
+
+def search_query(request, name='name'):
+    """Строка поиска не длиннее MAX_SEARCH_LENGTH."""
+    value = request.query_params.get(name, '')
+    if len(value) > settings.MAX_SEARCH_LENGTH:
+        raise ValidationError({name: [
+            f'Не больше {settings.MAX_SEARCH_LENGTH} символов.'
+        ]})
+    return value
+
+
+def check_values(name, values):
+    """Список значений фильтра не длиннее MAX_FILTER_VALUES."""
+    if values and len(values) > settings.MAX_FILTER_VALUES:
+        raise ValidationError({name: [
+            f'Не больше {settings.MAX_FILTER_VALUES} значений.'
+        ]})
@@ -0,0 +1,107 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_SUFFIX = '.collapsed'
+
+
+def frame_name(frame):
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}.{frame.f_code.co_name}'
+
+
+def collapse(frame):
+    """Стек кадра в формате collapsed stacks (корень слева)."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Сэмплирующий профайлер одного потока."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and not self._stop.is_set():
+                self.stacks[collapse(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def profiling_requested(request):
+    return (settings.PROFILING_ENABLED
+            and request.META.get(PROFILE_HEADER) == '1'
+            and request.user.is_staff)
+
+
+def save_stacks(endpoint, stacks):
+    """Сохраняет стеки одного запроса в каталог эндпоинта."""
+    directory = Path(settings.PROFILING_DIR) / endpoint
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{time.time_ns()}-{os.getpid()}{PROFILE_SUFFIX}'
+    with open(path, 'w', encoding='utf-8') as file:
+        for stack, count in stacks.items():
+            file.write(f'{stack} {count}\n')
+    return path
+
+
+def load_stacks(path):
+    stacks = Counter()
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+class ProfilingMixin:
+    """Профилирование действий вьюсета по заголовку X-Profile: 1.
+
+    Работает только при PROFILING_ENABLED и только для staff.
+    """
+
+    _sampler = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if profiling_requested(request):
+            self._sampler = StackSampler(
+                threading.get_ident(), settings.PROFILING_INTERVAL
+            ).start()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self._sampler is not None:
+            if hasattr(response, 'render'):
+                response.render()
+            stacks = self._sampler.stop()
+            self._sampler = None
+            save_stacks(f'{self.basename}.{self.action}', stacks)
+            response['X-Profile-Samples'] = sum(stacks.values())
+        return response
@@ -0,0 +1,125 @@
+import inspect
+import sys
+import traceback
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from rest_framework import serializers
+
+PROJECT_DIR = Path(settings.BASE_DIR).resolve()
+SKIP_DIRS = ('site-packages', 'dist-packages')
+SERIALIZERS_FILE = Path(serializers.__file__).resolve()
+
+
+def is_project_file(path):
+    return (PROJECT_DIR in path.parents
+            and not any(part in SKIP_DIRS for part in path.parts)
+            and path != Path(__file__).resolve())
+
+
+def serializer_field_frame(frame):
+    """Кадр поля сериализатора, из которого DRF читает атрибут объекта."""
+    field = frame.f_locals.get('field')
+    owner = frame.f_locals.get('self')
+    if not isinstance(field, serializers.Field) or owner is None:
+        return None
+    try:
+        filename = inspect.getsourcefile(type(owner))
+        _, lineno = inspect.getsourcelines(type(owner))
+    except (OSError, TypeError):
+        return None
+    if not is_project_file(Path(filename).resolve()):
+        return None
+    return traceback.FrameSummary(
+        filename, lineno,
+        f'{type(owner).__name__}.{field.field_name} (source={field.source})',
+        line='',
+    )
+
+
+def project_stack():
+    """Стек вызова в коде проекта, включая поля сериализаторов DRF."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = Path(frame.f_code.co_filename).resolve()
+        if path == SERIALIZERS_FILE:
+            summary = serializer_field_frame(frame)
+            if summary is not None:
+                frames.append(summary)
+        elif is_project_file(path):
+            frames.append(traceback.FrameSummary(
+                frame.f_code.co_filename, frame.f_lineno,
+                frame.f_code.co_name,
+            ))
+        frame = frame.f_back
+    frames.reverse()
+    return traceback.StackSummary.from_list(frames)
+
+
+class QueryRecorder:
+    """Записывает SQL-запросы вместе со стеком вызова в коде проекта."""
+
+    def __init__(self, using=connection):
+        self.connection = using
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, project_stack()))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def counts(self):
+        return Counter(sql for sql, _ in self.queries)
+
+    def first_stack(self, sql):
+        for query, stack in self.queries:
+            if query == sql:
+                return stack
+        return None
+
+
+class ScaleReport:
+    """Результат сравнения числа запросов эндпоинта на двух объёмах данных."""
+
+    def __init__(self, name, small, large):
+        self.name = name
+        self.small = small
+        self.large = large
+
+    @property
+    def failed(self):
+        return len(self.large) > len(self.small)
+
+    def growing_queries(self):
+        """Запросы, число повторов которых выросло вместе с данными."""
+        small_counts = self.small.counts()
+        return [
+            (sql, count, small_counts.get(sql, 0))
+            for sql, count in self.large.counts().most_common()
+            if count > small_counts.get(sql, 0)
+        ]
+
+    def format(self):
+        lines = [
+            f'{self.name}: {len(self.small)} -> {len(self.large)} запросов'
+        ]
+        for sql, large_count, small_count in self.growing_queries():
+            lines.append(f'  [{small_count} -> {large_count}] {sql}')
+            stack = self.large.first_stack(sql)
+            for entry in stack.format() if stack else ():
+                lines.extend('    ' + line for line in entry.splitlines())
+        return '\n'.join(lines)
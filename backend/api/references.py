@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, Tag
+from .caching import LocalCache
+
+
+class Record:
+    """Компактная запись справочника: только слоты с полями модели."""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+
+class TagRecord(Record):
+    __slots__ = ('id', 'name', 'color', 'slug', 'mask')
+
+
+class IngredientRecord(Record):
+    __slots__ = ('id', 'name', 'measurement_unit')
+
+
+class ReferenceTable:
+    """Снимок справочника: записи в порядке модели и индекс по id.
+
+    Индекс — список, где позиция равна id, пока id плотные, иначе
+    словарь. Индексы по другим полям строятся при первом обращении.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        size = max((record.id for record in records), default=-1) + 1
+        if size <= 2 * len(records) + 64:
+            self.by_id = [None] * size
+            for record in records:
+                self.by_id[record.id] = record
+        else:
+            self.by_id = {record.id: record for record in records}
+        self.indexes = {}
+
+    def get(self, pk):
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        if pk < 0:
+            return None
+        try:
+            return self.by_id[pk]
+        except (IndexError, KeyError):
+            return None
+
+    def find(self, field, value):
+        if field == 'id':
+            return self.get(value)
+        index = self.indexes.get(field)
+        if index is None:
+            index = self.indexes[field] = {
+                getattr(record, field): record for record in self.records
+            }
+        return index.get(value)
+
+
+class Reference:
+    """Справочник модели в памяти процесса.
+
+    Запись в модель после фиксации транзакции сбрасывает снимок во всех
+    воркерах через номер версии в общем кэше. Изменения в обход сигналов
+    (bulk_create, загрузка из CSV) видны через REFERENCE_CACHE_TTL или
+    сразу при проверке значения, которого нет в снимке, но есть в БД.
+    """
+
+    def __init__(self, model, record):
+        self.model = model
+        self.record = record
+        self.cache = LocalCache(
+            f'reference:{model._meta.label_lower}', 1,
+            settings.REFERENCE_CACHE_TTL,
+        )
+
+    def __deepcopy__(self, memo):
+        # Один справочник на процесс, в том числе в копиях полей DRF.
+        return self
+
+    def table(self):
+        self.cache.sync()
+        table = self.cache.get('table')
+        if table is None:
+            ordering = self.model._meta.ordering or ('pk',)
+            table = ReferenceTable(tuple(
+                self.record(*row) for row in self.model.objects.order_by(
+                    *ordering
+                ).values_list(*self.record.__slots__)
+            ))
+            self.cache.set('table', table)
+        return table
+
+    def resolve(self, field, values):
+        """Снимок, в котором есть все values, существующие в БД."""
+        table = self.table()
+        missing = [value for value in values
+                   if table.find(field, value) is None]
+        if not missing:
+            return table
+        try:
+            stale = self.model.objects.filter(
+                **{f'{field}__in': missing}
+            ).exists()
+        except (TypeError, ValueError):
+            stale = False
+        if stale:
+            self.invalidate()
+            table = self.table()
+        return table
+
+    def instance(self, record):
+        """Экземпляр модели из записи без запроса к БД."""
+        return self.model.from_db('default', self.record.__slots__, [
+            getattr(record, name) for name in self.record.__slots__
+        ])
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+
+tags = Reference(Tag, TagRecord)
+ingredients = Reference(Ingredient, IngredientRecord)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    transaction.on_commit(tags.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    transaction.on_commit(ingredients.invalidate)
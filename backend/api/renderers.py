@@ -0,0 +1,61 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    Fragment = orjson.Fragment
+else:
+    class Fragment:
+        """Заранее закодированный JSON, вставляемый в ответ как есть."""
+
+        __slots__ = ('contents',)
+
+        def __init__(self, contents):
+            self.contents = contents
+
+
+class FragmentEncoder(JSONEncoder):
+    """Кодировщик DRF, понимающий заранее закодированные фрагменты."""
+
+    def default(self, obj):
+        if isinstance(obj, Fragment):
+            return json.loads(obj.contents)
+        return super().default(obj)
+
+
+def encode(data):
+    """Кодирует данные в JSON-байты для кэширования фрагментов."""
+    if orjson is not None:
+        return orjson.dumps(data, default=FragmentEncoder().default)
+    return json.dumps(
+        data, cls=FragmentEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с поддержкой фрагментов.
+
+    Отступы из заголовка Accept и отсутствие orjson обрабатываются
+    стандартным JSONRenderer.
+    """
+
+    encoder_class = FragmentEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if orjson is None or indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
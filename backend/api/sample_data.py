@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.db import transaction
+
+from recipes.models import (Cart, Favorite, Ingredient, MealPlan, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from users.models import Follow, User
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Транзакция, которая всегда откатывается."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def populate(scale, ingredients_per_recipe=2):
+    """Создаёт scale авторов с рецептами и связи текущего пользователя."""
+    viewer = User.objects.create_user(
+        username='sample_viewer', email='sample_viewer@example.com',
+        first_name='sample', last_name='viewer', password='sample-password',
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(name=f'sample {i}', color=f'#00000{i}', slug=f'sample-{i}')
+        for i in range(2)
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'sample {i}', measurement_unit='г')
+        for i in range(scale * ingredients_per_recipe)
+    )
+    cart = Cart.objects.default(viewer)
+    authors = User.objects.bulk_create(
+        User(username=f'sample_author_{i}',
+             email=f'sample_author_{i}@example.com',
+             first_name='sample', last_name='author', password='!')
+        for i in range(scale)
+    )
+    for i, author in enumerate(authors):
+        Follow.objects.create(user=viewer, author=author)
+        recipe = Recipe.objects.create(
+            author=author, name=f'sample {i}', text='sample',
+            image='recipes/sample.png', cooking_time=i + 1,
+        )
+        recipe.tags.set(tags)
+        start = i * ingredients_per_recipe
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients[start:start + ingredients_per_recipe]
+        )
+        Favorite.objects.create(user=viewer, recipe=recipe)
+        ShoppingCart.objects.create(user=viewer, cart=cart,
+                                    recipe=recipe)
+        MealPlan.objects.create(user=viewer, recipe=recipe,
+                                date=date.today() + timedelta(days=i),
+                                meal=tags[i % len(tags)])
+    return viewer
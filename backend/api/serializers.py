@@ -7,8 +7,36 @@ from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from users.models import Follow, User
-from recipes.constants import MIN_INGREDIENT_VALUE, MIN_TIME_VALUE
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.constants import (MAX_PLAN_DAYS, MIN_INGREDIENT_VALUE,
+                               MIN_TIME_VALUE)
+from recipes.models import (Cart, Ingredient, MealPlan, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from recipes.nutrition import NUTRIENTS, update_nutrition
+from recipes.tasks import optimize_image
+from . import references
+from .fieldsets import SparseFieldsMixin
+from .params import recipes_limit
+
+
+class ReferenceField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField с проверкой id по справочнику в памяти."""
+
+    def __init__(self, reference, **kwargs):
+        self.reference = reference
+        kwargs.setdefault('queryset', reference.model.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        record = self.reference.resolve('id', [data]).get(data)
+        if record is not None:
+            return self.reference.instance(record)
+        try:
+            int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        self.fail('does_not_exist', pk_value=data)
 
 
 class UserCreateSerializer(UserCreateSerializer):
@@ -27,7 +55,7 @@ class UserCreateSerializer(UserCreateSerializer):
         return value
 
 
-class UserReadSerializer(UserSerializer):
+class UserReadSerializer(SparseFieldsMixin, UserSerializer):
     """Серилизатор списка пользователей"""
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -37,9 +65,11 @@ class UserReadSerializer(UserSerializer):
                   'first_name', 'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return (request and request.user.is_authenticated
-                and obj.following.filter(user=request.user).exists())
+                and obj.following.filter(user_id=request.user.id).exists())
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -47,7 +77,7 @@ class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
-        fields = '__all__'
+        fields = ('id', 'name', 'measurement_unit')
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -55,7 +85,7 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = '__all__'
+        fields = ('id', 'name', 'color', 'slug')
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
@@ -71,6 +101,105 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class UserCartField(serializers.PrimaryKeyRelatedField):
+    """id одной из корзин текущего пользователя."""
+
+    def get_queryset(self):
+        return Cart.objects.filter(user=self.context['request'].user)
+
+
+class ShoppingCartSerializer(serializers.ModelSerializer):
+    """Сериализатор добавления рецепта в корзину"""
+
+    cart = UserCartField(required=False)
+
+    class Meta:
+        model = ShoppingCart
+        fields = ('cart', 'servings')
+
+
+class CartEntrySerializer(serializers.ModelSerializer):
+    """Сериализатор рецепта в корзине"""
+
+    recipe = ShortRecipeSerializer(read_only=True)
+
+    class Meta:
+        model = ShoppingCart
+        fields = ('recipe', 'servings')
+
+
+class CartSerializer(serializers.ModelSerializer):
+    """Сериализатор корзины покупок"""
+
+    recipes = CartEntrySerializer(source='entries', many=True,
+                                  read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = ('id', 'name', 'recipes')
+
+    def validate_name(self, name):
+        carts = Cart.objects.filter(user=self.context['request'].user,
+                                    name=name)
+        if self.instance is not None:
+            carts = carts.exclude(pk=self.instance.pk)
+        if carts.exists():
+            raise serializers.ValidationError(
+                'Корзина с таким названием уже есть')
+        return name
+
+
+class MealPlanSerializer(serializers.ModelSerializer):
+    """Сериализатор записи плана питания"""
+
+    meal = serializers.SlugRelatedField(
+        slug_field='slug', queryset=Tag.objects.all(),
+        required=False, allow_null=True,
+    )
+
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'date', 'meal', 'recipe', 'servings')
+
+    def validate(self, data):
+        entry = {
+            field: data.get(field, getattr(self.instance, field, None))
+            for field in ('date', 'meal', 'recipe')
+        }
+        plans = MealPlan.objects.filter(user=self.context['request'].user,
+                                        **entry)
+        if self.instance is not None:
+            plans = plans.exclude(pk=self.instance.pk)
+        if plans.exists():
+            raise serializers.ValidationError(
+                'Рецепт уже запланирован на этот приём пищи')
+        return data
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['recipe'] = ShortRecipeSerializer(
+            instance.recipe, context=self.context
+        ).data
+        return data
+
+
+class PlanPeriodSerializer(serializers.Serializer):
+    """Период плана питания для списка покупок"""
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, data):
+        days = (data['end'] - data['start']).days + 1
+        if days < 1:
+            raise serializers.ValidationError(
+                'Конец периода раньше начала')
+        if days > MAX_PLAN_DAYS:
+            raise serializers.ValidationError(
+                f'Период не длиннее {MAX_PLAN_DAYS} дней')
+        return data
+
+
 class RecipeIngredientGetSerializer(serializers.ModelSerializer):
     """Сериализатор ингредиентов рецепта"""
 
@@ -85,9 +214,11 @@ class RecipeIngredientGetSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeGetSerializer(serializers.ModelSerializer):
+class RecipeGetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор списка рецептов"""
 
+    expandable = ('author', 'tags')
+
     author = UserReadSerializer(
         read_only=True,
     )
@@ -115,25 +246,32 @@ class RecipeGetSerializer(serializers.ModelSerializer):
             'image',
             'text',
             'cooking_time',
+            'kcal',
+            'proteins',
+            'fats',
+            'carbohydrates',
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return (request and request.user.is_authenticated
-                and obj.favorites.filter(user=request.user).exists())
+                and obj.favorites.filter(user_id=request.user.id).exists())
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         return (request and request.user.is_authenticated
-                and obj.shopping_list.filter(user=request.user).exists())
+                and obj.shopping_list.filter(
+                    user_id=request.user.id).exists())
 
 
 class AddIngredientRecipeSerializer(serializers.ModelSerializer):
     """ Сериализатор добавления ингредиентов """
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = ReferenceField(references.ingredients)
     amount = serializers.IntegerField()
 
     def validate_amount(self, value):
@@ -152,9 +290,7 @@ class AddIngredientRecipeSerializer(serializers.ModelSerializer):
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """ Сериализатор создания рецептов """
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = ReferenceField(references.tags, many=True)
     author = UserReadSerializer(read_only=True)
     ingredients = AddIngredientRecipeSerializer(many=True)
     image = Base64ImageField()
@@ -213,6 +349,9 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                 )
             )
         RecipeIngredient.objects.bulk_create(ingredient_list)
+        totals = update_nutrition([recipe.pk])[recipe.pk]
+        for nutrient, value in zip(NUTRIENTS, totals):
+            setattr(recipe, nutrient, value)
 
     @transaction.atomic
     def create(self, validated_data):
@@ -222,6 +361,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(author=request.user, **validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(recipe, ingredients)
+        optimize_image.enqueue(recipe_id=recipe.pk, name=recipe.image.name)
         return recipe
 
     @transaction.atomic
@@ -233,6 +373,10 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         instance.tags.set(tags)
         instance.image = validated_data.get('image') or instance.image
         instance.save()
+        if validated_data.get('image'):
+            optimize_image.enqueue(
+                recipe_id=instance.pk, name=instance.image.name
+            )
         return instance
 
     def to_representation(self, instance):
@@ -255,23 +399,24 @@ class SubscriptionSerializer(UserReadSerializer):
                             'first_name', 'last_name')
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         return (request and not request.user.is_anonymous
-                and Follow.objects.filter(user=request.user,
+                and Follow.objects.filter(user_id=request.user.id,
                                           author=obj).exists())
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            try:
-                recipes = recipes[:int(limit)]
-            except ValueError:
-                raise ValueError('Количество рецептов должно быть численным')
+        recipes = getattr(obj, 'limited_recipes', None)
+        if recipes is None:
+            recipes = obj.recipes.all()[
+                :recipes_limit(self.context.get('request'))
+            ]
         return ShortRecipeSerializer(recipes, many=True, read_only=True).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
 
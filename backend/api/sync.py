@@ -0,0 +1,106 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Favorite, Recipe, ShoppingCart, Tombstone
+from users.models import Follow
+from .params import parse_int
+
+# Токен — микросекунды от начала эпохи, не позже 9999 года.
+MAX_TOKEN = 253_402_300_799 * 1_000_000
+DELETED = {
+    Tombstone.RECIPE: 'recipes',
+    Tombstone.FAVORITE: 'favorites',
+    Tombstone.CART: 'cart',
+    Tombstone.FOLLOW: 'follows',
+}
+
+
+def encode_token(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_token(value):
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc)
+
+
+def encode_cursor(token, recipe_id):
+    return f'{token}.{recipe_id}'
+
+
+def decode_cursor(value):
+    """Курсор продолжения 'токен.id рецепта' -> (токен, id) или (None, 0)."""
+    if not value:
+        return None, 0
+    token, _, recipe_id = value.partition('.')
+    moment, recipe_id = parse_int(token), parse_int(recipe_id)
+    if moment is None or recipe_id is None or moment > MAX_TOKEN:
+        raise ValidationError({'cursor': ['Неверный курсор.']})
+    return token, recipe_id
+
+
+def changes(user, since, token=None, after=0):
+    """Данные пользователя, изменённые после since, и удалённые id.
+
+    Рецепты — свои, из избранного и корзин; рецепт отдаётся и тогда,
+    когда изменился не он сам, а его запись в избранном или корзине.
+    since=None или старше хранения отметок об удалении — полная выгрузка
+    (full), клиент заменяет свои данные. Токен ответа отстаёт от времени
+    запроса на SYNC_OVERLAP_SECONDS, чтобы не терять изменения
+    незавершённых транзакций и отставание реплик: записи из этого окна
+    придут повторно.
+
+    Рецепты упорядочены по id и отдаются страницами: продолжение
+    (after — последний отданный id) сохраняет токен первой страницы
+    и содержит только рецепты.
+    """
+    now = timezone.now()
+    if since is not None and since < now - timedelta(
+        days=settings.SYNC_TOMBSTONE_DAYS
+    ):
+        since = None
+    favorites = Favorite.objects.filter(user_id=user.id,
+                                        recipe__deleted_at__isnull=True)
+    entries = ShoppingCart.objects.filter(user_id=user.id,
+                                          recipe__deleted_at__isnull=True)
+    follows = Follow.objects.filter(user_id=user.id,
+                                    author__deleted_at__isnull=True)
+    recipes = Recipe.objects.for_read(user).filter(
+        Q(author_id=user.id)
+        | Q(pk__in=favorites.values('recipe_id'))
+        | Q(pk__in=entries.values('recipe_id'))
+    )
+    deleted = defaultdict(list)
+    if since is not None:
+        favorites = favorites.filter(updated_at__gt=since)
+        entries = entries.filter(updated_at__gt=since)
+        follows = follows.filter(updated_at__gt=since)
+        recipes = recipes.filter(
+            Q(updated_at__gt=since)
+            | Q(pk__in=favorites.values('recipe_id'))
+            | Q(pk__in=entries.values('recipe_id'))
+        )
+        if not after:
+            for kind, pk in Tombstone.objects.filter(
+                Q(user_id=user.id) | Q(user__isnull=True),
+                deleted_at__gt=since,
+            ).values_list('kind', 'object_id'):
+                deleted[DELETED[kind]].append(pk)
+    rows = not after
+    return {
+        'token': token or encode_token(
+            now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+        ),
+        'full': since is None,
+        'recipes': recipes.filter(pk__gt=after).order_by('pk'),
+        'favorites': list(favorites.values('id', 'recipe')) if rows else [],
+        'cart': list(
+            entries.values('id', 'cart', 'recipe', 'servings')
+        ) if rows else [],
+        'follows': list(follows.values('id', 'author')) if rows else [],
+        'deleted': {name: deleted[name] for name in DELETED.values()},
+    }
@@ -0,0 +1,120 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+# KEYS[1] — корзина, ARGV — ёмкость, токенов в секунду и стоимость.
+# Время берётся у Redis, чтобы часы воркеров не расходились.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'time')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'time', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+def parse_bucket(value):
+    """'ёмкость/пополнение в минуту' -> (ёмкость, токенов в секунду)."""
+    capacity, per_minute = value.split('/')
+    return int(capacity), float(per_minute) / 60
+
+
+class TokenBucket:
+    """Корзины токенов в кэше default.
+
+    С Redis списание атомарно для всех воркеров (Lua-скрипт), с другими
+    бэкендами чтение и запись корзины защищены блокировкой процесса,
+    чего достаточно для LocMemCache.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, cost):
+        """Списывает cost токенов; возвращает 0 или секунды ожидания."""
+        cost = min(cost, capacity)
+        backend = caches['default']
+        if isinstance(backend, RedisCache):
+            key = backend.make_and_validate_key(key)
+            client = backend._cache.get_client(key, write=True)
+            script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            return float(script(keys=[key], args=[capacity, rate, cost]))
+        timeout = math.ceil(capacity / rate) + 1
+        with self.lock:
+            now = time.time()
+            tokens, updated = backend.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated) * rate)
+            wait = 0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            backend.set(key, (tokens, now), timeout)
+        return wait
+
+
+buckets = TokenBucket()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение запросов корзиной токенов на клиента и класс эндпоинта.
+
+    Класс берётся из throttle_scope представления (или действия), иначе
+    read для безопасных методов и write для остальных; размеры корзин —
+    THROTTLE_BUCKETS. Клиент — пользователь или IP анонима. Дорогие
+    запросы списывают больше токенов: get_throttle_cost(request) или
+    throttle_cost представления.
+    """
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def get_cost(self, request, view):
+        get_cost = getattr(view, 'get_throttle_cost', None)
+        if get_cost is not None:
+            return get_cost(request)
+        return getattr(view, 'throttle_cost', 1)
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = self.get_scope(request, view)
+        capacity, rate = parse_bucket(settings.THROTTLE_BUCKETS[scope])
+        self.wait_seconds = buckets.consume(
+            f'throttle:{scope}:{self.get_client(request)}',
+            capacity, rate, self.get_cost(request, view),
+        )
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
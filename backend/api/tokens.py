@@ -0,0 +1,154 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import (TokenObtainPairSerializer,
+                                                  TokenRefreshSerializer,
+                                                  TokenVerifySerializer)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+from users.models import User
+
+REVOKING_FIELDS = ('password', 'is_active', 'is_staff')
+
+
+def add_claims(token, user):
+    token['username'] = user.username
+    token['is_staff'] = user.is_staff
+    # iat — целые секунды, для сравнения с отзывом нужно точное время.
+    token['issued'] = time.time()
+    return token
+
+
+def revoke(token):
+    """Отзывает один токен до конца срока его действия."""
+    ttl = token['exp'] - int(time.time())
+    if ttl > 0:
+        cache.set(f'jwt-revoked:{token[api_settings.JTI_CLAIM]}', True, ttl)
+
+
+def revoke_user(user_id):
+    """Отзывает все токены пользователя, выданные до этого момента."""
+    cache.set(
+        f'jwt-revoked-user:{user_id}',
+        time.time(),
+        int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()),
+    )
+
+
+def is_revoked(token):
+    keys = (
+        f'jwt-revoked:{token[api_settings.JTI_CLAIM]}',
+        f'jwt-revoked-user:{token[api_settings.USER_ID_CLAIM]}',
+    )
+    found = cache.get_many(keys)
+    if keys[0] in found:
+        return True
+    since = found.get(keys[1])
+    if since is None:
+        return False
+    # У токенов без issued точного времени нет: отзываются все выданные
+    # в секунду отзыва.
+    issued = token.get('issued')
+    if issued is None:
+        return token['iat'] <= int(since)
+    return issued < since
+
+
+def check_revoked(token):
+    if is_revoked(token):
+        raise InvalidToken('Токен отозван.')
+    return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя на чтение.
+
+    Для безопасных методов request.user — TokenUser с id, username и
+    is_staff из токена; изменяющие запросы получают пользователя из БД.
+    Отозванные токены отклоняются по списку в общем кэше.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = check_revoked(self.get_validated_token(raw_token))
+        if request.method in SAFE_METHODS:
+            return TokenUser(token), token
+        return self.get_user(token), token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """Выдаёт новую пару токенов и отзывает использованный refresh."""
+
+    def validate(self, attrs):
+        refresh = check_revoked(self.token_class(attrs['refresh']))
+        user = User.objects.filter(
+            pk=refresh[api_settings.USER_ID_CLAIM], is_active=True
+        ).first()
+        if user is None:
+            raise InvalidToken('Пользователь не найден.')
+        add_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            revoke(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class RevocationTokenVerifySerializer(TokenVerifySerializer):
+
+    def validate(self, attrs):
+        check_revoked(UntypedToken(attrs['token']))
+        return {}
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        try:
+            attrs['token'] = RefreshToken(attrs['refresh'])
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        return attrs
+
+
+@receiver(pre_save, sender=User)
+def revoke_changed_user(instance, update_fields=None, **kwargs):
+    if (not settings.JWT_AUTH_ENABLED or instance._state.adding
+            or (update_fields and set(update_fields) <= {'last_login'})):
+        return
+    stored = User.objects.filter(pk=instance.pk).values(
+        *REVOKING_FIELDS
+    ).first()
+    if stored and any(
+        stored[name] != getattr(instance, name) for name in REVOKING_FIELDS
+    ):
+        # Время отзыва — момент фиксации: токены, выданные по старым
+        # данным до неё, тоже отзываются.
+        transaction.on_commit(partial(revoke_user, instance.pk))
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from . import async_views
+from .views import (CartViewSet, EventListView, IngredientViewSet,
+                    MealPlanViewSet, RecipeViewSet, SyncView, TagViewSet,
+                    TokenRevokeView, UserViewSet)
 
 app_name = 'api'
 
@@ -11,9 +15,31 @@ router.register('ingredients', IngredientViewSet, basename='ingridients')
 router.register('tags', TagViewSet, basename='tags')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('users', UserViewSet, basename='users')
+router.register('carts', CartViewSet, basename='carts')
+router.register('meal_plan', MealPlanViewSet, basename='meal_plan')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('events/', EventListView.as_view(), name='events'),
+    path('sync/', SyncView.as_view(), name='sync'),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.JWT_AUTH_ENABLED:
+    urlpatterns += [
+        path('auth/jwt/logout/', TokenRevokeView.as_view(),
+             name='jwt-logout'),
+        path('auth/', include('djoser.urls.jwt')),
+    ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('recipes/', async_views.recipe_list),
+        path('recipes/download_shopping_cart/',
+             async_views.download_shopping_cart),
+        path('recipes/<int:pk>/', async_views.recipe_detail),
+        path('ingredients/', async_views.ingredient_list),
+        path('tags/', async_views.tag_list),
+        path('events/', async_views.event_list),
+    ] + urlpatterns
@@ -1,6 +1,10 @@
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import Now
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import SetPasswordSerializer
@@ -8,34 +12,112 @@ from djoser.views import UserViewSet
 
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from events.outbox import events_after, publish
 from users.models import Follow
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
-from .filters import IngredientFilter, RecipeFilter
+from recipes.models import (Cart, Favorite, Ingredient, MealPlan, Recipe,
+                            RecipeIngredient, ShoppingCart, Tag)
+from . import meal_plans, references, sync
+from .fast_serializers import RecipeReader
+from .fieldsets import FieldSelection
+from .filters import (IngredientFilter, MealPlanFilter, RecipeFilter,
+                      ingredients_by_name)
 from .pagination import CustomPaginator
+from .params import int_param, parse_int, recipes_limit, search_query
 from .permissions import IsAuthorOrReadOnly
-from .serializers import (IngredientSerializer, RecipeCreateSerializer,
-                          RecipeGetSerializer, ShortRecipeSerializer,
+from .profiling import ProfilingMixin
+from .serializers import (CartSerializer, IngredientSerializer,
+                          MealPlanSerializer, PlanPeriodSerializer,
+                          RecipeCreateSerializer, RecipeGetSerializer,
+                          ShoppingCartSerializer, ShortRecipeSerializer,
                           SubscribeSerializer, SubscriptionSerializer,
                           TagSerializer, UserCreateSerializer,
                           UserReadSerializer)
+from .tokens import (StatelessJWTAuthentication, TokenRevokeSerializer,
+                     revoke)
 
 User = get_user_model()
 
+MAX_SEQUENCE = 2 ** 63 - 1
+
+
+def shopping_list_items(user, cart_id=None):
+    """Список покупок по всем корзинам пользователя или по одной."""
+    lookups = {'user_id': user.id}
+    if cart_id is not None:
+        lookups['cart_id'] = cart_id
+    return RecipeIngredient.objects.totals('shopping_list', **lookups)
+
+
+def format_amount(amount):
+    return f'{amount:.3f}'.rstrip('0').rstrip('.')
+
+
+def shopping_list_response(buy_list):
+    shopping_list = ['Список покупок:\n']
+    for item in buy_list:
+        name = item['name']
+        unit = item['unit']
+        amount = format_amount(item['amount'])
+        shopping_list.append(f'\n{name} - {amount}, {unit}')
+    response = HttpResponse(shopping_list, content_type='text/plain')
+    filename = 'shopping_cart.txt'
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def cart_param(request):
+    """id корзины из ?cart=, None — все корзины пользователя."""
+    value = request.query_params.get('cart')
+    if value is None:
+        return None
+    cart_id = parse_int(value)
+    if cart_id is None:
+        raise ValidationError({'cart': 'Укажите id корзины.'})
+    return cart_id
+
 
-class UserViewSet(UserViewSet):
+def reference_object(view):
+    """Запись справочника view.reference вместо get_object по БД.
+
+    Запись, которой нет в снимке, ищется в БД: её могли добавить в
+    обход сигналов (bulk_create при загрузке из CSV).
+    """
+    pk = view.kwargs[view.lookup_field]
+    record = view.reference.resolve('id', [pk]).get(pk)
+    if record is None:
+        raise Http404
+    view.check_object_permissions(view.request, record)
+    return record
+
+
+class UserViewSet(ProfilingMixin, UserViewSet):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     pagination_class = CustomPaginator
 
+    def get_queryset(self):
+        queryset = super().get_queryset().active()
+        selection = FieldSelection.from_request(self.request)
+        if (self.action in ('list', 'retrieve')
+                and selection.wants('is_subscribed')):
+            return queryset.with_is_subscribed(self.request.user)
+        return queryset
+
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return UserReadSerializer
         elif self.action == 'set_password':
             return SetPasswordSerializer
+        elif self.action == 'destroy':
+            return super().get_serializer_class()
         return UserCreateSerializer
 
     @action(
@@ -46,7 +128,10 @@ class UserViewSet(UserViewSet):
     def me(self, request):
         """Профиль"""
 
-        serializer = UserReadSerializer(request.user)
+        user = request.user
+        if not isinstance(user, User):
+            user = get_object_or_404(User, pk=user.id)
+        serializer = UserReadSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(
@@ -55,7 +140,7 @@ class UserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscribe(self, request, id):
-        author = get_object_or_404(User, id=id)
+        author = get_object_or_404(User.objects.active(), id=id)
         if request.method == 'POST':
             serializer = SubscribeSerializer(
                 data={'user': request.user.id, 'author': author.id},
@@ -73,6 +158,12 @@ class UserViewSet(UserViewSet):
             {'errors': 'Вы не подписаны на этого пользователя'},
             status=status.HTTP_400_BAD_REQUEST)
 
+    def get_throttle_cost(self, request):
+        """Подписки стоят больше с ростом recipes_limit"""
+        if self.action != 'subscriptions':
+            return 1
+        return 1 + recipes_limit(request) // 10
+
     @action(
         detail=False,
         methods=('get',),
@@ -81,7 +172,22 @@ class UserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         """Страница подписок пользователя"""
-        queryset = User.objects.filter(following__user=request.user)
+        selection = FieldSelection.from_request(request)
+        queryset = User.objects.active().filter(
+            following__user_id=request.user.id
+        ).order_by('id')
+        if selection.wants('is_subscribed'):
+            queryset = queryset.with_is_subscribed(request.user)
+        if selection.wants('recipes_count'):
+            queryset = queryset.annotate(recipes_count=Count(
+                'recipes', filter=Q(recipes__deleted_at__isnull=True)
+            ))
+        if selection.wants('recipes'):
+            queryset = queryset.prefetch_related(Prefetch(
+                'recipes',
+                queryset=Recipe.objects.all()[:recipes_limit(request)],
+                to_attr='limited_recipes',
+            ))
         paginated_queryset = self.paginate_queryset(queryset)
         serializer = SubscriptionSerializer(paginated_queryset,
                                             many=True,
@@ -89,7 +195,7 @@ class UserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ProfilingMixin, viewsets.ModelViewSet):
     """Страницы рецептов"""
 
     queryset = Recipe.objects.all()
@@ -97,12 +203,31 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     pagination_class = CustomPaginator
+    throttle_scope = None
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Recipe.objects.for_read(
+                self.request.user, FieldSelection.from_request(self.request)
+            )
+        return Recipe.objects.all()
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return RecipeGetSerializer
         return RecipeCreateSerializer
 
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        reader = RecipeReader(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(reader.rows(queryset))
+        return self.get_paginated_response(reader.serialize(page))
+
     @action(
         methods=['post', 'delete'],
         detail=True,
@@ -117,17 +242,54 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return self.del_from(Favorite, request.user, pk)
 
     @action(
-        methods=('post', 'delete',),
+        methods=('post', 'patch', 'delete',),
         detail=True,
         permission_classes=(IsAuthenticated,),
         pagination_class=CustomPaginator
     )
     def shopping_cart(self, request, pk=None):
-        """Страница продуктовой корзины"""
+        """Страница продуктовой корзины
 
-        if self.request.method == 'POST':
-            return self.add_to(ShoppingCart, request.user, pk)
-        return self.del_from(ShoppingCart, request.user, pk)
+        Без cart рецепт добавляется в первую корзину пользователя,
+        а порции меняются и рецепт удаляется во всех его корзинах.
+        """
+
+        if self.request.method == 'DELETE':
+            entries = ShoppingCart.objects.filter(user=request.user,
+                                                  recipe_id=pk)
+            cart_id = cart_param(request)
+            if cart_id is not None:
+                entries = entries.filter(cart_id=cart_id)
+            if entries.delete()[0]:
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response({'errors': 'Данный рецепт не добавлен'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = ShoppingCartSerializer(data=request.data,
+                                            context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        recipe = get_object_or_404(Recipe, pk=pk)
+        if self.request.method == 'PATCH':
+            if 'servings' not in data:
+                raise ValidationError({'servings': 'Укажите число порций.'})
+            entries = ShoppingCart.objects.filter(user=request.user,
+                                                  recipe=recipe)
+            if 'cart' in data:
+                entries = entries.filter(cart=data['cart'])
+            if not entries.update(servings=data['servings'],
+                                  updated_at=Now()):
+                return Response({'errors': 'Данный рецепт не добавлен'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response(ShortRecipeSerializer(recipe).data)
+        cart = data.get('cart') or Cart.objects.default(request.user)
+        if cart.entries.filter(recipe=recipe).exists():
+            return Response({'errors': 'Рецепт уже добавлен!'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        ShoppingCart.objects.create(**{
+            **data, 'user': request.user, 'cart': cart, 'recipe': recipe,
+        })
+        serializer = ShortRecipeSerializer(recipe)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def del_from(self, model, user, pk):
         obj = model.objects.filter(user=user, recipe_id=pk)
@@ -138,38 +300,78 @@ class RecipeViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST)
 
     def add_to(self, model, user, pk):
-        if model.objects.filter(user=user, recipe_id=pk).exists():
+        recipe = get_object_or_404(Recipe, pk=pk)
+        if model.objects.filter(user=user, recipe=recipe).exists():
             return Response({'errors': 'Рецепт уже добавлен!'},
                             status=status.HTTP_400_BAD_REQUEST)
-        model.objects.create(user=user, recipe_id=pk)
-        recipe = get_object_or_404(Recipe, pk=pk)
+        model.objects.create(user=user, recipe=recipe)
         serializer = ShortRecipeSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(
         detail=False,
         methods=('get',),
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        throttle_scope='export',
     )
     def download_shopping_cart(self, request):
-        """Выгрузка списка покупок"""
-        buy_list = RecipeIngredient.objects.filter(
-            recipe__shopping_list__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(
-            amount=Sum('amount')
+        """Выгрузка списка покупок, ?cart= — одной корзины"""
+        cart_id = cart_param(request)
+        if cart_id is not None:
+            get_object_or_404(Cart, pk=cart_id, user_id=request.user.id)
+        return shopping_list_response(
+            shopping_list_items(request.user, cart_id)
+        )
+
+
+class CartViewSet(viewsets.ModelViewSet):
+    """Корзины покупок пользователя"""
+
+    queryset = Cart.objects.all()
+    serializer_class = CartSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = None
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user_id=self.request.user.id
+        ).prefetch_related(
+            Prefetch('entries', queryset=ShoppingCart.objects.filter(
+                recipe__deleted_at__isnull=True
+            ).select_related('recipe'))
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class MealPlanViewSet(viewsets.ModelViewSet):
+    """План питания пользователя"""
+
+    queryset = MealPlan.objects.all()
+    serializer_class = MealPlanSerializer
+    permission_classes = (IsAuthenticated,)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = MealPlanFilter
+    pagination_class = CustomPaginator
+    throttle_scope = None
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user_id=self.request.user.id, recipe__deleted_at__isnull=True
+        ).select_related('recipe', 'meal')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=('get',), throttle_scope='export')
+    def shopping_list(self, request):
+        """Список покупок по плану за даты с start по end"""
+        period = PlanPeriodSerializer(data=request.query_params)
+        period.is_valid(raise_exception=True)
+        return shopping_list_response(
+            meal_plans.shopping_list(request.user, **period.validated_data)
         )
-        shopping_list = ['Список покупок:\n']
-        for item in buy_list:
-            name = item['ingredient__name']
-            unit = item['ingredient__measurement_unit']
-            amount = item['amount']
-            shopping_list.append(f'\n{name} - {amount}, {unit}')
-        response = HttpResponse(shopping_list, content_type='text/plain')
-        filename = 'shopping_cart.txt'
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
 
 
 class IngredientViewSet(mixins.ListModelMixin,
@@ -183,6 +385,22 @@ class IngredientViewSet(mixins.ListModelMixin,
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     pagination_class = None
+    reference = references.ingredients
+
+    def get_throttle_cost(self, request):
+        """Поиск по названию дороже карточки, весь справочник — ещё дороже"""
+        if self.action != 'list':
+            return 1
+        return 2 if request.query_params.get('name') else 10
+
+    def list(self, request, *args, **kwargs):
+        records = ingredients_by_name(
+            self.reference.table().records, search_query(request)
+        )
+        return Response(self.get_serializer(records, many=True).data)
+
+    def get_object(self):
+        return reference_object(self)
 
 
 class TagViewSet(mixins.ListModelMixin,
@@ -194,3 +412,83 @@ class TagViewSet(mixins.ListModelMixin,
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    reference = references.tags
+
+    def list(self, request, *args, **kwargs):
+        records = self.reference.table().records
+        return Response(self.get_serializer(records, many=True).data)
+
+    def get_object(self):
+        return reference_object(self)
+
+
+class TokenRevokeView(APIView):
+    """Выход: отзывает refresh-токен и текущий access-токен."""
+
+    authentication_classes = (StatelessJWTAuthentication,)
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke(serializer.validated_data['token'])
+        if request.auth is not None:
+            revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def event_params(request):
+    """since, limit и wait запроса к потоку событий."""
+    return (
+        int_param(request, 'since', MAX_SEQUENCE, 0),
+        int_param(request, 'limit', settings.EVENTS_BATCH,
+                  settings.EVENTS_BATCH, minimum=1),
+        int_param(request, 'wait', settings.EVENTS_MAX_WAIT, 0),
+    )
+
+
+def events_page(events, since):
+    return {
+        'events': events,
+        'next': events[-1]['sequence'] if events else since,
+    }
+
+
+class SyncView(APIView):
+    """Изменения данных пользователя после токена since"""
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        since = int_param(request, 'since', sync.MAX_TOKEN)
+        limit = int_param(request, 'limit', settings.SYNC_BATCH,
+                          settings.SYNC_BATCH, minimum=1)
+        token, after = sync.decode_cursor(request.query_params.get('cursor'))
+        data = sync.changes(
+            request.user, None if since is None else sync.decode_token(since),
+            token, after,
+        )
+        recipes = list(data['recipes'][:limit + 1])
+        data['next'] = sync.encode_cursor(
+            data['token'], recipes[limit - 1].pk
+        ) if len(recipes) > limit else None
+        data['recipes'] = RecipeGetSerializer(
+            recipes[:limit], many=True, context={'request': request}
+        ).data
+        return Response(data)
+
+
+class EventListView(APIView):
+    """События после номера since; wait — сколько секунд ждать новых"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        since, limit, wait = event_params(request)
+        deadline = time.monotonic() + wait
+        while True:
+            publish()
+            events = list(events_after(since, limit))
+            if events or time.monotonic() >= deadline:
+                return Response(events_page(events, since))
+            time.sleep(settings.EVENTS_POLL_INTERVAL)
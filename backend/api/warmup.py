@@ -0,0 +1,33 @@
+from django.db import connections
+from django.http import HttpRequest
+from django.urls import get_resolver
+
+from . import references
+from .fast_serializers import RecipeReader
+
+
+def prime_tags(reader):
+    lookups = [lookup[len('tag__'):] for lookup in reader.tag.lookups[1:]]
+    reader.group(
+        reader.tag, 'tag', 'tag__id', None,
+        ((None, *(getattr(tag, lookup) for lookup in lookups))
+         for tag in references.tags.table().records),
+    )
+
+
+def warm_up():
+    """Прогрев процесса до приёма запросов.
+
+    Импортирует все представления и сериализаторы через URLconf,
+    компилирует сериализаторы чтения рецептов, загружает справочники
+    тегов и ингредиентов и заполняет по ним кэш JSON-фрагментов тегов.
+    Соединения с БД закрываются, чтобы не попасть в дочерние процессы
+    после fork.
+    """
+    get_resolver().url_patterns
+    reader = RecipeReader(HttpRequest())
+    references.tags.table()
+    references.ingredients.table()
+    if reader.fragments is not None:
+        prime_tags(reader)
+    connections.close_all()
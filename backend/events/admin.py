@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from foodgram.admin_tools import LargeTableMixin
+from .models import Event
+
+
+@admin.register(Event)
+class EventAdmin(LargeTableMixin, admin.ModelAdmin):
+    list_display = ('sequence', 'type', 'payload', 'created_at')
+    list_filter = ('type',)
+    readonly_fields = ('sequence', 'type', 'payload', 'created_at')
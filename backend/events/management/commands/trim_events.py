@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from events.models import Event
+
+
+class Command(BaseCommand):
+    """Удаляет опубликованные события старше EVENTS_RETENTION_DAYS.
+
+    Удаление идёт пачками по первичному ключу, чтобы не держать
+    блокировки на всю таблицу.
+    """
+
+    help = '''Удаление старых событий.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.EVENTS_RETENTION_DAYS)
+        parser.add_argument('--batch', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(days=options['days'])
+        # Последнее событие остаётся, чтобы номера продолжились с него.
+        last = Event.objects.aggregate(last=Max('sequence'))['last'] or 0
+        old = Event.objects.filter(sequence__lt=last, created_at__lt=border)
+        deleted = 0
+        while True:
+            batch = list(old.order_by('sequence').values_list(
+                'pk', flat=True
+            )[:options['batch']])
+            if not batch:
+                break
+            deleted += Event.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(f'Удалено событий: {deleted}')
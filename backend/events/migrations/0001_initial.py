@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.BigIntegerField(null=True, unique=True, verbose_name='Номер')),
+                ('type', models.CharField(choices=[('recipe.created', 'Рецепт создан'), ('recipe.updated', 'Рецепт изменён'), ('recipe.deleted', 'Рецепт удалён'), ('favorite.added', 'Рецепт добавлен в избранное'), ('favorite.removed', 'Рецепт удалён из избранного'), ('follow.added', 'Подписка'), ('follow.removed', 'Отписка')], max_length=32, verbose_name='Тип')),
+                ('payload', models.JSONField(default=dict, verbose_name='Данные')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+            ],
+            options={
+                'verbose_name': 'Событие',
+                'verbose_name_plural': 'События',
+                'ordering': ('sequence',),
+                'indexes': [models.Index(condition=models.Q(('sequence__isnull', True)), fields=['id'], name='event_unpublished_idx')],
+            },
+        ),
+    ]
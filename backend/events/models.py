@@ -0,0 +1,46 @@
+from django.db import models
+from django.db.models import Q
+
+
+class Event(models.Model):
+    """Событие об изменении данных для внешних потребителей (outbox).
+
+    Пишется в той же транзакции, что и изменение. Номер sequence
+    выдаётся после фиксации транзакции по порядку (events.outbox.publish),
+    поэтому потребитель, читающий события после известного номера,
+    не пропускает события медленных транзакций.
+    """
+
+    RECIPE_CREATED = 'recipe.created'
+    RECIPE_UPDATED = 'recipe.updated'
+    RECIPE_DELETED = 'recipe.deleted'
+    FAVORITE_ADDED = 'favorite.added'
+    FAVORITE_REMOVED = 'favorite.removed'
+    FOLLOW_ADDED = 'follow.added'
+    FOLLOW_REMOVED = 'follow.removed'
+    TYPES = (
+        (RECIPE_CREATED, 'Рецепт создан'),
+        (RECIPE_UPDATED, 'Рецепт изменён'),
+        (RECIPE_DELETED, 'Рецепт удалён'),
+        (FAVORITE_ADDED, 'Рецепт добавлен в избранное'),
+        (FAVORITE_REMOVED, 'Рецепт удалён из избранного'),
+        (FOLLOW_ADDED, 'Подписка'),
+        (FOLLOW_REMOVED, 'Отписка'),
+    )
+
+    sequence = models.BigIntegerField('Номер', null=True, unique=True)
+    type = models.CharField('Тип', max_length=32, choices=TYPES)
+    payload = models.JSONField('Данные', default=dict)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        ordering = ('sequence',)
+        indexes = [
+            models.Index(fields=['id'], condition=Q(sequence__isnull=True),
+                         name='event_unpublished_idx'),
+        ]
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
+
+    def __str__(self):
+        return f'{self.sequence or "-"} {self.type}'
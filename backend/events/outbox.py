@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .models import Event
+
+# Ключ pg_advisory_xact_lock, под которым выдаются номера событий.
+PUBLISH_LOCK = 480_001
+
+
+def record(type, **payload):
+    """Добавляет событие в текущую транзакцию."""
+    Event.objects.create(type=type, payload=payload)
+
+
+def record_many(type, payloads):
+    """Добавляет события одного типа одним запросом."""
+    Event.objects.bulk_create(
+        Event(type=type, payload=payload) for payload in payloads
+    )
+
+
+def publish(batch=None):
+    """Нумерует зафиксированные события без номера в порядке id.
+
+    Номера выдаются под блокировкой, так что два вызова не получат
+    одинаковых номеров. События ещё не зафиксированных транзакций не
+    видны и получат номер при следующем вызове, после уже выданных.
+    """
+    events = Event.objects.using('default')
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)',
+                               [PUBLISH_LOCK])
+        pending = list(events.filter(sequence__isnull=True).order_by(
+            'id'
+        ).values_list('pk', flat=True)[:batch or settings.EVENTS_BATCH])
+        if not pending:
+            return 0
+        last = events.aggregate(last=Max('sequence'))['last'] or 0
+        events.bulk_update([
+            Event(pk=pk, sequence=last + number)
+            for number, pk in enumerate(pending, 1)
+        ], ['sequence'])
+    return len(pending)
+
+
+def events_after(since, limit):
+    """Опубликованные события с номером больше since по порядку."""
+    return Event.objects.filter(sequence__gt=since).order_by(
+        'sequence'
+    ).values('sequence', 'type', 'payload', 'created_at')[:limit]
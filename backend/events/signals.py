@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Favorite, Recipe
+from users.models import Follow
+from .models import Event
+from .outbox import record
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(instance, created, **kwargs):
+    if instance.deleted_at is not None:
+        event = Event.RECIPE_DELETED
+    elif created:
+        event = Event.RECIPE_CREATED
+    else:
+        event = Event.RECIPE_UPDATED
+    record(event, recipe=instance.pk, author=instance.author_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(instance, **kwargs):
+    """Событие уже записано при мягком удалении, если оно было."""
+    if instance.deleted_at is None:
+        record(Event.RECIPE_DELETED,
+               recipe=instance.pk, author=instance.author_id)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(instance, created, **kwargs):
+    if created:
+        record(Event.FAVORITE_ADDED,
+               user=instance.user_id, recipe=instance.recipe_id)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(instance, **kwargs):
+    record(Event.FAVORITE_REMOVED,
+           user=instance.user_id, recipe=instance.recipe_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_added(instance, created, **kwargs):
+    if created:
+        record(Event.FOLLOW_ADDED,
+               user=instance.user_id, author=instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_removed(instance, **kwargs):
+    record(Event.FOLLOW_REMOVED,
+           user=instance.user_id, author=instance.author_id)
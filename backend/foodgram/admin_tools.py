@@ -0,0 +1,102 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Начиная с этой оценки числа строк список без фильтров не считает
+# COUNT(*), а берёт оценку из статистики PostgreSQL.
+ESTIMATE_FROM = 100_000
+
+
+def estimated_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table],
+        )
+        return cursor.fetchone()[0]
+
+
+def is_unfiltered(queryset):
+    """В выборке нет условий, кроме условий менеджера по умолчанию.
+
+    Менеджер может всегда скрывать часть строк (мягко удалённые
+    рецепты), такая выборка для оценки считается выборкой без фильтров.
+    """
+    base = queryset.model._default_manager.all().query
+    return queryset.query.where == base.where
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, который не считает строки большой таблицы без фильтров.
+
+    Последние страницы по оценке могут оказаться пустыми, админка в
+    этом случае возвращает на первую страницу.
+    """
+
+    @cached_property
+    def count(self):
+        if is_unfiltered(self.object_list):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= ESTIMATE_FROM:
+                return estimate
+        return super().count
+
+
+class LargeTableMixin:
+    """Список админки без полного COUNT(*) на каждой странице."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с полем ввода вместо списка всех значений в боковой панели."""
+
+    template = 'admin/input_filter.html'
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+            'display': 'Все',
+            'parameter_name': self.parameter_name,
+            'value': self.value() or '',
+            'placeholder': self.placeholder,
+            'query_parts': [
+                (name, value) for name, value in changelist.params.items()
+                if name not in (self.parameter_name, 'p')
+            ],
+        }
+
+
+class SoftDeleteMixin:
+    """Удаление через soft_delete модели, без сбора связанных объектов.
+
+    Связанные строки позже удаляет фоновая очистка, поэтому страница
+    подтверждения показывает только сами объекты.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return ([str(obj) for obj in objs],
+                {self.model._meta.verbose_name_plural: len(objs)}, set(), [])
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.soft_delete()
@@ -0,0 +1,69 @@
+import os
+import threading
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2.pool import ThreadedConnectionPool
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(alias, size, conn_params):
+    """Пул соединений процесса; после fork создаётся заново."""
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ThreadedConnectionPool(1, size, **conn_params)
+                _pools[key] = pool
+    return pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений psycopg2 внутри процесса.
+
+    Соединение берётся из пула при первом запросе к БД и возвращается
+    в него при закрытии в конце запроса (CONN_MAX_AGE = 0). В пуле
+    держится до POOL_SIZE соединений на процесс, поэтому потоков в
+    воркере должно быть не больше POOL_SIZE.
+    """
+
+    def get_pool(self, conn_params):
+        return get_pool(self.alias, self.settings_dict['POOL_SIZE'],
+                        conn_params)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        connection = pool.getconn()
+        if (self.settings_dict['CONN_HEALTH_CHECKS']
+                and not self._is_alive(connection)):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+        self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    @staticmethod
+    def _is_alive(connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.get_pool(self.get_connection_params()).putconn(
+                    self.connection, close=self.errors_occurred
+                )
@@ -0,0 +1,106 @@
+import contextvars
+import hashlib
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+# Модели, которые всегда читаются с основной базы: по ним проходит
+# аутентификация сразу после входа.
+PRIMARY_MODELS = {'authtoken.token', 'sessions.session'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Реплика, из которой читает текущий запрос, или None.
+read_replica = contextvars.ContextVar('read_replica', default=None)
+
+
+def pin_key(request):
+    client = (request.META.get('HTTP_AUTHORIZATION')
+              or request.META.get('REMOTE_ADDR', ''))
+    return 'db-pin:' + hashlib.sha256(client.encode()).hexdigest()
+
+
+class ReplicaRouter:
+    """Отправляет чтение в реплики только внутри ReplicaMiddleware.
+
+    Запись, миграции, команды и чтение вне безопасных запросов к api
+    идут в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = read_replica.get()
+        if replica is None or model._meta.label_lower in PRIMARY_MODELS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """Безопасные запросы к api читают из реплик.
+
+    Реплика выбирается один раз на запрос, чтобы COUNT и строки одной
+    страницы не пришли из реплик с разным отставанием.
+
+    После успешного изменяющего запроса клиент (по заголовку
+    Authorization или IP) на DB_REPLICA_PIN_SECONDS закрепляется за
+    основной базой, чтобы видеть свои изменения несмотря на отставание
+    реплик.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key, token = self.route(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_replica.reset(token)
+        return self.pin(request, key, response)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        key, token = self.route(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_replica.reset(token)
+        return self.pin(request, key, response)
+
+    def route(self, request):
+        key = pin_key(request)
+        replica = None
+        if (request.method in SAFE_METHODS
+                and request.path.startswith('/api/')
+                and not cache.get(key)):
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        return key, read_replica.set(replica)
+
+    def pin(self, request, key, response):
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            cache.set(key, True, settings.DB_REPLICA_PIN_SECONDS)
+        return response
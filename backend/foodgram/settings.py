@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -31,10 +32,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
+    'events.apps.EventsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -48,7 +52,7 @@ ROOT_URLCONF = 'foodgram.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -63,14 +67,50 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': ('foodgram.postgres_pool' if DB_POOL_SIZE
+                   else 'django.db.backends.postgresql'),
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (0 if DB_POOL_SIZE
+                         else int(os.getenv('CONN_MAX_AGE', 60))),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('CONN_HEALTH_CHECKS', 'true').lower() == 'true'
+        ),
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DISABLE_SERVER_SIDE_CURSORS', 'false').lower()
+            == 'true'
+        ),
+        'POOL_SIZE': DB_POOL_SIZE,
+    }
+}
+
+for number, address in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['foodgram.replicas.ReplicaRouter']
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
@@ -117,16 +157,32 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPaginator',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+    'NUM_PROXIES': int(os.getenv('THROTTLE_NUM_PROXIES', 1)),
     'PAGE_SIZE': 6,
 }
 
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'true').lower() == 'true'
+# Корзины токенов по классам эндпоинтов: 'ёмкость/пополнение в минуту'.
+THROTTLE_BUCKETS = {
+    'read': os.getenv('THROTTLE_READ', '300/120'),
+    'write': os.getenv('THROTTLE_WRITE', '60/30'),
+    'export': os.getenv('THROTTLE_EXPORT', '10/4'),
+}
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'USER_ID_FIELD': 'id',
@@ -144,3 +200,72 @@ DJOSER = {
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'false').lower() == 'true'
+
+FAST_READ_SERIALIZERS = (
+    os.getenv('FAST_READ_SERIALIZERS', 'false').lower() == 'true'
+)
+JSON_FRAGMENTS = os.getenv('JSON_FRAGMENTS', 'true').lower() == 'true'
+FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', 10000))
+REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', 300))
+MEAL_PLAN_CACHE_TTL = int(os.getenv('MEAL_PLAN_CACHE_TTL', 3600))
+
+# Предельные значения параметров запросов, больше — ответ 400.
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+MAX_RECIPES_LIMIT = int(os.getenv('MAX_RECIPES_LIMIT', 50))
+MAX_SEARCH_LENGTH = int(os.getenv('MAX_SEARCH_LENGTH', 100))
+MAX_FILTER_VALUES = int(os.getenv('MAX_FILTER_VALUES', 20))
+# Сколько ингредиентов отдаёт поиск, в том числе без названия.
+INGREDIENT_LIST_LIMIT = int(os.getenv('INGREDIENT_LIST_LIMIT', 100))
+
+# Поток событий /api/events/: события за ответ, ожидание новых и хранение.
+EVENTS_BATCH = int(os.getenv('EVENTS_BATCH', 500))
+EVENTS_MAX_WAIT = int(os.getenv('EVENTS_MAX_WAIT', 25))
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', 1))
+EVENTS_RETENTION_DAYS = int(os.getenv('EVENTS_RETENTION_DAYS', 7))
+
+# Синхронизация /api/sync/: хранение отметок об удалении, перекрытие окон
+# и рецептов в ответе.
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+SYNC_OVERLAP_SECONDS = int(os.getenv('SYNC_OVERLAP_SECONDS', 30))
+SYNC_BATCH = int(os.getenv('SYNC_BATCH', 200))
+
+# Очистка мягко удалённых рецептов и пользователей: строк за транзакцию.
+PURGE_BATCH = int(os.getenv('PURGE_BATCH', 500))
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 300))
+AUTH_TOKEN_SHARED_CACHE = (
+    os.getenv('AUTH_TOKEN_SHARED_CACHE', 'false').lower() == 'true'
+)
+
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'false').lower() == 'true'
+JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', 2))
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 5))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', 10))
+JOBS_LOCK_TIMEOUT = int(os.getenv('JOBS_LOCK_TIMEOUT', 600))
+RECIPE_IMAGE_MAX_SIDE = int(os.getenv('RECIPE_IMAGE_MAX_SIDE', 1200))
+
+JWT_AUTH_ENABLED = os.getenv('JWT_AUTH_ENABLED', 'false').lower() == 'true'
+if JWT_AUTH_ENABLED:
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].append(
+        'api.tokens.StatelessJWTAuthentication'
+    )
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('JWT_ACCESS_MINUTES', 15))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('JWT_REFRESH_DAYS', 7))
+    ),
+    'ROTATE_REFRESH_TOKENS': True,
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'api.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.tokens.RotatingTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'api.tokens.RevocationTokenVerifySerializer',
+}
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_INTERVAL = float(os.getenv('PROFILING_INTERVAL', 0.005))
@@ -0,0 +1,38 @@
+import os
+
+try:
+    cores = len(os.sched_getaffinity(0))
+except AttributeError:
+    cores = os.cpu_count() or 1
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:8010')
+wsgi_app = os.getenv('WEB_APP', 'foodgram.wsgi')
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_WORKERS') or cores * 2 + 1)
+threads = int(os.getenv('WEB_THREADS', 4))
+preload_app = os.getenv('WEB_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 100))
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def when_ready(server):
+    if preload_app:
+        from api.warmup import warm_up
+        warm_up()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        from api.warmup import warm_up
+        warm_up()
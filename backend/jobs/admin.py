@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.contrib.admin import display
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('name', 'payload', 'attempts', 'locked_at',
+                       'last_error', 'created_at')
+    actions = ('retry',)
+
+    @display(description='Повторить')
+    def retry(self, request, queryset):
+        queryset.update(status=Job.QUEUED, attempts=0,
+                        run_at=timezone.now(), locked_at=None)
@@ -0,0 +1,107 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, connections
+
+from jobs.queue import execute, fetch
+
+
+class Stop:
+    """Флаг остановки, который ставит SIGTERM или SIGINT."""
+
+    def __init__(self):
+        self.requested = False
+
+    def __bool__(self):
+        return self.requested
+
+    def handle(self, *args):
+        self.requested = True
+
+
+def work(stop, batch, idle, once=False):
+    """Цикл воркера: выполняет задачи пачками, без задач ждёт idle с."""
+    done = failed = 0
+    while not stop:
+        close_old_connections()
+        jobs = fetch(batch)
+        if not jobs:
+            if once:
+                break
+            time.sleep(idle)
+            continue
+        for job in jobs:
+            if execute(job):
+                done += 1
+            else:
+                failed += 1
+    connections.close_all()
+    return done, failed
+
+
+def child(batch, idle):
+    stop = Stop()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop.handle)
+    work(stop, batch, idle)
+
+
+class Command(BaseCommand):
+    """Пул процессов-воркеров очереди jobs.
+
+    Каждый процесс забирает задачи через SELECT ... FOR UPDATE SKIP
+    LOCKED, поэтому процессы и контейнеры с воркерами можно добавлять
+    без координации. SIGTERM и Ctrl+C дают воркерам закончить текущую
+    задачу; упавший процесс перезапускается.
+    """
+
+    help = '''Запуск воркеров фоновых задач.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=settings.JOBS_WORKERS)
+        parser.add_argument('--batch', type=int, default=10)
+        parser.add_argument('--idle', type=float, default=1.0,
+                            help='Пауза при пустой очереди, с')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и выйти')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done, failed = work(Stop(), options['batch'], 0, once=True)
+            self.stdout.write(f'Выполнено: {done}, с ошибкой: {failed}')
+            return
+        count = options['processes']
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        if count > 1 and not skip_locked:
+            self.stderr.write(
+                f'{connection.vendor} не поддерживает SKIP LOCKED, '
+                'запускается один воркер'
+            )
+            count = 1
+        stop = Stop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, stop.handle)
+        connections.close_all()
+        processes = [None] * count
+        while not stop:
+            for index, process in enumerate(processes):
+                if process is not None and process.is_alive():
+                    continue
+                if process is not None:
+                    self.stderr.write(
+                        f'Воркер {process.pid} завершился с кодом '
+                        f'{process.exitcode}, перезапуск'
+                    )
+                processes[index] = multiprocessing.Process(
+                    target=child, args=(options['batch'], options['idle']),
+                )
+                processes[index].start()
+            time.sleep(1)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
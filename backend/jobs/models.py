@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Задача в очереди фоновых задач.
+
+    Выполненные задачи удаляются, проваленные после max_attempts
+    попыток остаются со статусом failed и текстом последней ошибки.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.JSONField('Аргументы', default=dict)
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    run_at = models.DateTimeField('Запуск не раньше', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ('run_at',)
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx'),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,101 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+registry = {}
+
+
+class Task:
+    """Функция, которую можно поставить в очередь: task.enqueue(**kwargs).
+
+    Аргументы хранятся в JSON, поэтому передаются id, а не объекты.
+    Изменения в БД фиксируются вместе с удалением задачи, остальные
+    побочные эффекты (файлы) при повторе выполняются заново, так что
+    задача должна быть идемпотентной.
+    """
+
+    def __init__(self, function, name, max_attempts):
+        self.function = function
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.function(**kwargs)
+
+    def enqueue(self, delay=0, **kwargs):
+        if settings.JOBS_EAGER:
+            self(**kwargs)
+            return None
+        return Job.objects.create(
+            name=self.name, payload=kwargs, max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(function=None, *, name=None, max_attempts=None):
+    """Регистрирует функцию из модуля tasks приложения как задачу."""
+    def register(function):
+        registered = Task(
+            function, name or f'{function.__module__}.{function.__name__}',
+            max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        )
+        registry[registered.name] = registered
+        return registered
+    return register(function) if function else register
+
+
+def fetch(batch):
+    """Забирает готовые задачи, не блокируясь на взятых другими воркерами.
+
+    Задачи, которые висят в работе дольше JOBS_LOCK_TIMEOUT (воркер
+    упал), забираются снова или проваливаются, если попытки кончились.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(Job.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Job.QUEUED, run_at__lte=now)
+            | Q(status=Job.RUNNING, locked_at__lt=stale)
+        ).order_by('run_at')[:batch])
+        exhausted = [job.pk for job in jobs
+                     if job.attempts >= job.max_attempts]
+        if exhausted:
+            Job.objects.filter(pk__in=exhausted).update(
+                status=Job.FAILED, locked_at=None,
+                last_error='Воркер не завершил задачу',
+            )
+        jobs = [job for job in jobs if job.pk not in exhausted]
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+        )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def execute(job):
+    """Выполняет задачу; возвращает False при ошибке."""
+    try:
+        with transaction.atomic():
+            registry[job.name](**job.payload)
+            Job.objects.filter(pk=job.pk).delete()
+        return True
+    except Exception:
+        error = traceback.format_exc()
+    if job.name in registry and job.attempts < job.max_attempts:
+        delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.QUEUED, locked_at=None, last_error=error,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+    else:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, locked_at=None, last_error=error,
+        )
+    return False
@@ -2,9 +2,30 @@ from django.contrib import admin
 from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.admin import display
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                     ShoppingCart, Tag)
+from api.params import parse_int
+from foodgram.admin_tools import (InputFilter, LargeTableMixin,
+                                  SoftDeleteMixin)
+from .models import (Cart, Favorite, Ingredient, MealPlan, Recipe,
+                     RecipeIngredient, ShoppingCart, Tag, UnitConversion)
+from .nutrition import update_nutrition
+
+
+class AuthorFilter(InputFilter):
+    title = 'Автор рецепта'
+    parameter_name = 'author'
+    placeholder = 'id или username'
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        author_id = parse_int(value)
+        if author_id is not None:
+            return queryset.filter(author_id=author_id)
+        return queryset.filter(author__username=value)
 
 
 class RecipeIngredientInlineFormSet(forms.models.BaseInlineFormSet):
@@ -27,25 +48,47 @@ class RecipeIngredientInline(admin.TabularInline):
     min_num = 1
     extra = 1
     formset = RecipeIngredientInlineFormSet
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient'
+        )
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(SoftDeleteMixin, LargeTableMixin, admin.ModelAdmin):
     list_display = ('name', 'id', 'author', 'count_favorites')
-    readonly_fields = ('count_favorites',)
-    list_filter = ('author', 'name', 'tags')
+    list_select_related = ('author',)
+    readonly_fields = ('count_favorites', 'kcal', 'proteins', 'fats',
+                       'carbohydrates')
+    list_filter = (AuthorFilter, 'tags')
+    search_fields = ('^name',)
+    autocomplete_fields = ('author',)
     inlines = [RecipeIngredientInline, ]
     exclude = ('ingredients', )
 
+    def get_queryset(self, request):
+        favorites = Favorite.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(count=Count('pk'))
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(Subquery(favorites.values('count')), 0)
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_nutrition([form.instance.pk])
+
     @display(description='Количество в избранных')
     def count_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
-    list_display = ('name', 'measurement_unit', 'id')
-    list_filter = ('name',)
+    list_display = ('name', 'measurement_unit', 'kcal', 'id')
+    search_fields = ('^name',)
 
 
 @admin.register(Tag)
@@ -53,16 +96,57 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'color', 'slug',)
 
 
+@admin.register(UnitConversion)
+class UnitConversionAdmin(admin.ModelAdmin):
+    list_display = ('unit', 'factor', 'base_unit')
+    search_fields = ('unit', 'base_unit')
+
+
+@admin.register(Cart)
+class CartAdmin(LargeTableMixin, admin.ModelAdmin):
+    list_display = ('name', 'user', 'id')
+    list_select_related = ('user',)
+    search_fields = ('^name',)
+    autocomplete_fields = ('user',)
+
+
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe',)
+class ShoppingCartAdmin(LargeTableMixin, admin.ModelAdmin):
+    list_display = ('user', 'cart', 'recipe', 'servings')
+    list_select_related = ('user', 'cart', 'recipe')
+    autocomplete_fields = ('user', 'cart', 'recipe')
+
+
+@admin.register(MealPlan)
+class MealPlanAdmin(LargeTableMixin, admin.ModelAdmin):
+    list_display = ('date', 'meal', 'user', 'recipe', 'servings')
+    list_select_related = ('meal', 'user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    date_hierarchy = 'date'
 
 
 @admin.register(Favorite)
-class FavouriteAdmin(admin.ModelAdmin):
+class FavouriteAdmin(LargeTableMixin, admin.ModelAdmin):
     list_display = ('user', 'recipe',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
 
 
 @admin.register(RecipeIngredient)
-class IngredientInRecipe(admin.ModelAdmin):
+class IngredientInRecipe(LargeTableMixin, admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount', 'id')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        update_nutrition({obj.recipe_id, form.initial.get('recipe')} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        update_nutrition([obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        super().delete_queryset(request, queryset)
+        update_nutrition(recipe_ids)
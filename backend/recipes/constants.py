@@ -2,3 +2,9 @@ MAX_LENGTH_FIELDS_FOR_RECIPE = 200
 HEX_LENGTH = 7
 MIN_INGREDIENT_VALUE = 1
 MIN_TIME_VALUE = 1
+MIN_SERVINGS = 1
+DEFAULT_CART_NAME = 'Список покупок'
+# Самый длинный период списка покупок по плану питания, дней.
+MAX_PLAN_DAYS = 366
+# Биты знакового BigIntegerField под маску тегов рецепта.
+TAG_MASK_BITS = 63
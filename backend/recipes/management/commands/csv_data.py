@@ -2,18 +2,70 @@ import csv
 
 from django.core.management.base import BaseCommand
 from recipes.models import Ingredient
+from recipes.nutrition import NUTRIENTS
+from recipes.tasks import update_recipes_nutrition
+
+
+def number(value):
+    return float(value) if value.strip() else None
 
 
 class Command(BaseCommand):
+    """Загрузка ингредиентов из csv.
+
+    Колонки: название, единица измерения и необязательные калорийность,
+    белки, жиры и углеводы на единицу измерения. Ценность уже
+    загруженных ингредиентов обновляется, а пересчёт рецептов с
+    изменившимися ингредиентами ставится в очередь.
+    """
+
     help = '''Загрузка информации из csv-файла в базу данных.'''
 
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default='recipes/data/ingredients.csv')
+
     def handle(self, *args, **options):
-        with open('recipes/data/ingredients.csv', encoding='utf-8') as file:
+        plain = {}
+        nutrition = {}
+        with open(options['file'], encoding='utf-8') as file:
             file_reader = csv.reader(file)
             for row in file_reader:
-                name, measurement_unit = row
-                Ingredient.objects.get_or_create(
-                    name=name,
-                    measurement_unit=measurement_unit
+                name, measurement_unit, *values = row
+                ingredient = Ingredient(
+                    name=name, measurement_unit=measurement_unit
                 )
+                key = (name, measurement_unit)
+                if values:
+                    for nutrient, value in zip(NUTRIENTS, values):
+                        setattr(ingredient, nutrient, number(value))
+                    nutrition[key] = ingredient
+                else:
+                    plain[key] = ingredient
+        Ingredient.objects.bulk_create(plain.values(), batch_size=500,
+                                       ignore_conflicts=True)
+        if nutrition:
+            changed = self.changed_ingredients(nutrition)
+            Ingredient.objects.bulk_create(
+                nutrition.values(), batch_size=500, update_conflicts=True,
+                unique_fields=('name', 'measurement_unit'),
+                update_fields=NUTRIENTS,
+            )
+            if changed:
+                update_recipes_nutrition.enqueue(ingredient_ids=changed)
         self.stdout.write(self.style.SUCCESS('Данные успешно импортрованы'))
+
+    def changed_ingredients(self, nutrition):
+        """id загруженных ранее ингредиентов, ценность которых в файле другая.
+
+        У новых ингредиентов ещё нет рецептов, их пересчитывать не нужно.
+        """
+        stored = Ingredient.objects.filter(
+            name__in={name for name, _ in nutrition}
+        ).values_list('pk', 'name', 'measurement_unit', *NUTRIENTS)
+        return [
+            pk for pk, name, unit, *values in stored.iterator()
+            if (name, unit) in nutrition and tuple(values) != tuple(
+                getattr(nutrition[name, unit], nutrient)
+                for nutrient in NUTRIENTS
+            )
+        ]
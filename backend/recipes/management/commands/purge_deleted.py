@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.purge import purge
+
+
+class Command(BaseCommand):
+    """Удаляет строки мягко удалённых рецептов и пользователей.
+
+    То же делает задача purge_deleted; команда нужна, если очередь
+    отстала. Каждая пачка — отдельная транзакция.
+    """
+
+    help = '''Очистка мягко удалённых рецептов и пользователей.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int,
+                            default=settings.PURGE_BATCH)
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                count = purge(options['batch'])
+            if not count:
+                break
+            deleted += count
+        self.stdout.write(f'Удалено строк: {deleted}')
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import Tombstone
+
+
+class Command(BaseCommand):
+    """Удаляет отметки об удалении старше SYNC_TOMBSTONE_DAYS.
+
+    Клиенты с токеном старше этого срока получают полную выгрузку,
+    поэтому отметки им уже не нужны. Удаление идёт пачками.
+    """
+
+    help = '''Удаление старых отметок об удалении.'''
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        border = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+        old = Tombstone.objects.filter(deleted_at__lt=border)
+        deleted = 0
+        while True:
+            batch = list(old.order_by('deleted_at').values_list(
+                'pk', flat=True
+            )[:options['batch']])
+            if not batch:
+                break
+            deleted += Tombstone.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(f'Удалено отметок: {deleted}')
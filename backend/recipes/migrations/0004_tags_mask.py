@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:02
+
+from django.db import migrations, models
+
+TAG_MASK_BITS = 63
+
+
+def fill_masks(apps, schema_editor):
+    Tag = apps.get_model('recipes', 'Tag')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    tags = list(Tag.objects.order_by('pk')[:TAG_MASK_BITS])
+    for bit, tag in enumerate(tags):
+        tag.mask = 1 << bit
+    Tag.objects.bulk_update(tags, ['mask'])
+    masks = {}
+    for recipe_id, mask in Recipe.tags.through.objects.exclude(
+        tag__mask=None
+    ).values_list('recipe_id', 'tag__mask'):
+        masks[recipe_id] = masks.get(recipe_id, 0) | mask
+    Recipe.objects.bulk_update(
+        [Recipe(pk=pk, tags_mask=mask) for pk, mask in masks.items()],
+        ['tags_mask'], batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_relation_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Маска тэгов'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='mask',
+            field=models.BigIntegerField(editable=False, null=True, unique=True, verbose_name='Бит тэга'),
+        ),
+        migrations.RunPython(fill_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:17
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+DEFAULT_CART_NAME = 'Список покупок'
+CONVERSIONS = (
+    ('кг', 'г', 1000),
+    ('мг', 'г', 0.001),
+    ('л', 'мл', 1000),
+)
+
+
+def fill_carts(apps, schema_editor):
+    Cart = apps.get_model('recipes', 'Cart')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    UnitConversion = apps.get_model('recipes', 'UnitConversion')
+    UnitConversion.objects.bulk_create(
+        UnitConversion(unit=unit, base_unit=base_unit, factor=factor)
+        for unit, base_unit, factor in CONVERSIONS
+    )
+    users = ShoppingCart.objects.values_list(
+        'user_id', flat=True
+    ).order_by().distinct()
+    Cart.objects.bulk_create(
+        Cart(user_id=user_id, name=DEFAULT_CART_NAME) for user_id in users
+    )
+    for cart in Cart.objects.all().iterator():
+        ShoppingCart.objects.filter(user_id=cart.user_id).update(cart=cart)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0004_tags_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название корзины')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='carts', to=settings.AUTH_USER_MODEL, verbose_name='Владелец корзины')),
+            ],
+            options={
+                'verbose_name': 'Корзина',
+                'verbose_name_plural': 'Корзины',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_cart_name'),
+        ),
+        migrations.CreateModel(
+            name='UnitConversion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unit', models.CharField(max_length=200, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(max_length=200, verbose_name='Базовая единица')),
+                ('factor', models.FloatField(verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Перевод единиц',
+                'verbose_name_plural': 'Переводы единиц',
+                'ordering': ('unit',),
+            },
+        ),
+        # Колонки у связи нет, меняется только состояние моделей.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddField(
+                model_name='ingredient',
+                name='conversion',
+                field=models.ForeignObject(from_fields=('measurement_unit',), null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='recipes.unitconversion', to_fields=('unit',)),
+            ),
+        ]),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='cart',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='recipes.cart', verbose_name='Корзина'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='servings',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Во сколько раз умножить количества рецепта', validators=[django.core.validators.MinValueValidator(1, 'Порций должно быть не меньше 1')], verbose_name='Порций'),
+        ),
+        migrations.RunPython(fill_carts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_carts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='cart',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='recipes.cart', verbose_name='Корзина'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='shoppingcart',
+            name='unique_recipe',
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcart',
+            constraint=models.UniqueConstraint(fields=('cart', 'recipe'), name='unique_cart_recipe'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppingcart',
+            index=models.Index(fields=['user', 'recipe'], name='shopping_cart_user_recipe_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:22
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0006_cart_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('servings', models.PositiveSmallIntegerField(default=1, help_text='Во сколько раз умножить количества рецепта', validators=[django.core.validators.MinValueValidator(1, 'Порций должно быть не меньше 1')], verbose_name='Порций')),
+                ('meal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='recipes.tag', verbose_name='Приём пищи')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plans', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='meal_plans', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'План питания',
+                'verbose_name_plural': 'Планы питания',
+                'ordering': ('date', 'id'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mealplan',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'meal', 'recipe'), name='unique_meal_plan'),
+        ),
+    ]
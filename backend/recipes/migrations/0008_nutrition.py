@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_meal_plan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='carbohydrates',
+            field=models.FloatField(blank=True, help_text='г на единицу измерения', null=True, verbose_name='Углеводы'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='fats',
+            field=models.FloatField(blank=True, help_text='г на единицу измерения', null=True, verbose_name='Жиры'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='kcal',
+            field=models.FloatField(blank=True, help_text='ккал на единицу измерения', null=True, verbose_name='Калорийность'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='proteins',
+            field=models.FloatField(blank=True, help_text='г на единицу измерения', null=True, verbose_name='Белки'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(editable=False, null=True, verbose_name='Углеводы'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(editable=False, null=True, verbose_name='Жиры'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='kcal',
+            field=models.FloatField(db_index=True, editable=False, null=True, verbose_name='Калорийность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(editable=False, null=True, verbose_name='Белки'),
+        ),
+    ]
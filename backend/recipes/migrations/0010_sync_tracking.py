@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменён'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recipe', 'Рецепт'), ('favorite', 'Избранное'), ('cart', 'Рецепт в корзине'), ('follow', 'Подписка')], max_length=16, verbose_name='Что удалено')),
+                ('object_id', models.BigIntegerField(verbose_name='id удалённой записи')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Удалено')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Владелец')),
+            ],
+            options={
+                'verbose_name': 'Удалённая запись',
+                'verbose_name_plural': 'Удалённые записи',
+                'ordering': ('deleted_at',),
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx')],
+            },
+        ),
+    ]
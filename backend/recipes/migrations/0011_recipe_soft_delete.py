@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_sync_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='deleted_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Удалён'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='recipe_deleted_idx'),
+        ),
+    ]
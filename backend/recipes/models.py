@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from . import constants as c
 from .validators import hex_validator
@@ -8,8 +10,31 @@ from .validators import hex_validator
 User = get_user_model()
 
 
+class TagQuerySet(models.QuerySet):
+    """Теги с выдачей свободных битов маски."""
+
+    def free_masks(self, count):
+        used = set(self.model.objects.exclude(mask=None).values_list(
+            'mask', flat=True
+        ))
+        free = [1 << bit for bit in range(c.TAG_MASK_BITS)
+                if 1 << bit not in used][:count]
+        return free + [None] * (count - len(free))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        new = [tag for tag in objs if tag.mask is None]
+        for tag, mask in zip(new, self.free_masks(len(new))):
+            tag.mask = mask
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Tag(models.Model):
-    '''Модель тэгов.'''
+    '''Модель тэгов.
+
+    mask — бит тега в Recipe.tags_mask. Теги сверх TAG_MASK_BITS бита
+    не получают и фильтруются через связующую таблицу.
+    '''
 
     name = models.CharField(
         'Название тэга',
@@ -27,6 +52,14 @@ class Tag(models.Model):
         'Слаг тэга',
         unique=True,
     )
+    mask = models.BigIntegerField(
+        'Бит тэга',
+        unique=True,
+        null=True,
+        editable=False,
+    )
+
+    objects = TagQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Тэг'
@@ -35,6 +68,38 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.mask is None:
+            self.mask, = Tag.objects.free_masks(1)
+        super().save(*args, **kwargs)
+
+
+class UnitConversion(models.Model):
+    """Приведение единицы измерения к базовой: 1 unit = factor base_unit.
+
+    Список покупок складывает количества в базовой единице, поэтому
+    «кг» и «г» одного продукта попадают в одну строку.
+    """
+
+    unit = models.CharField(
+        'Единица измерения',
+        max_length=c.MAX_LENGTH_FIELDS_FOR_RECIPE,
+        unique=True,
+    )
+    base_unit = models.CharField(
+        'Базовая единица',
+        max_length=c.MAX_LENGTH_FIELDS_FOR_RECIPE,
+    )
+    factor = models.FloatField('Множитель')
+
+    class Meta:
+        ordering = ('unit',)
+        verbose_name = 'Перевод единиц'
+        verbose_name_plural = 'Переводы единиц'
+
+    def __str__(self):
+        return f'1 {self.unit} = {self.factor:g} {self.base_unit}'
+
 
 class Ingredient(models.Model):
     '''Модель ингредиентов.'''
@@ -47,6 +112,31 @@ class Ingredient(models.Model):
         max_length=c.MAX_LENGTH_FIELDS_FOR_RECIPE,
         verbose_name='Единицы измерения',
     )
+    kcal = models.FloatField(
+        'Калорийность', null=True, blank=True,
+        help_text='ккал на единицу измерения',
+    )
+    proteins = models.FloatField(
+        'Белки', null=True, blank=True,
+        help_text='г на единицу измерения',
+    )
+    fats = models.FloatField(
+        'Жиры', null=True, blank=True,
+        help_text='г на единицу измерения',
+    )
+    carbohydrates = models.FloatField(
+        'Углеводы', null=True, blank=True,
+        help_text='г на единицу измерения',
+    )
+    # Связь без колонки: JOIN по measurement_unit = UnitConversion.unit.
+    conversion = models.ForeignObject(
+        UnitConversion,
+        on_delete=models.DO_NOTHING,
+        from_fields=('measurement_unit',),
+        to_fields=('unit',),
+        null=True,
+        related_name='+',
+    )
 
     class Meta:
         constraints = [
@@ -61,13 +151,79 @@ class Ingredient(models.Model):
         return f'{self.name} {self.measurement_unit}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Выборки рецептов с данными для сериализации."""
+
+    USER_FLAGS = ('is_favorited', 'is_in_shopping_cart')
+
+    def with_user_flags(self, user, flags=USER_FLAGS):
+        if user.is_anonymous:
+            return self.annotate(
+                **{flag: models.Value(False) for flag in flags}
+            )
+        relations = {
+            'is_favorited': Favorite,
+            'is_in_shopping_cart': ShoppingCart,
+        }
+        return self.annotate(**{
+            flag: models.Exists(relations[flag].objects.filter(
+                user_id=user.id, recipe=models.OuterRef('pk')
+            ))
+            for flag in flags
+        })
+
+    def for_read(self, user, selection=None):
+        """Рецепты для RecipeGetSerializer.
+
+        selection (FieldSelection из api) отключает аннотации, prefetch
+        и загрузку описания для полей, которых нет в ответе.
+        """
+        def wants(name, expand=False):
+            if selection is None:
+                return True
+            return (selection.wants(name)
+                    and (not expand or selection.expanded(name)))
+
+        queryset = self.with_user_flags(
+            user, [flag for flag in self.USER_FLAGS if wants(flag)]
+        )
+        if not wants('text'):
+            queryset = queryset.defer('text')
+        lookups = []
+        if wants('author', expand=True):
+            lookups.append(models.Prefetch(
+                'author', queryset=User.objects.with_is_subscribed(user)
+            ))
+        if wants('tags'):
+            lookups.append('tags')
+        if wants('ingredients'):
+            lookups.append(models.Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ))
+        return queryset.prefetch_related(*lookups)
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    """Рецепты без мягко удалённых."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
-    """Модель рецептов."""
+    """Модель рецептов.
+
+    Удаление мягкое (soft_delete): рецепт скрывается из всех выборок
+    objects, а связанные записи пачками удаляет фоновая очистка
+    (recipes.purge). all_objects видит и удалённые рецепты.
+    """
 
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         blank=False,
+        db_index=False,
         related_name='recipes',
         verbose_name='Автор рецепта',
     )
@@ -97,6 +253,18 @@ class Recipe(models.Model):
         verbose_name='Тэги',
         help_text='Выберите тэги',
     )
+    tags_mask = models.BigIntegerField(
+        'Маска тэгов',
+        default=0,
+        db_index=True,
+        editable=False,
+    )
+    kcal = models.FloatField(
+        'Калорийность', null=True, db_index=True, editable=False,
+    )
+    proteins = models.FloatField('Белки', null=True, editable=False)
+    fats = models.FloatField('Жиры', null=True, editable=False)
+    carbohydrates = models.FloatField('Углеводы', null=True, editable=False)
     cooking_time = models.PositiveSmallIntegerField(
         'Время приготовления',
         validators=[
@@ -107,17 +275,61 @@ class Recipe(models.Model):
         ],
         help_text='Время приготовления в минутах',
     )
+    updated_at = models.DateTimeField('Изменён', auto_now=True)
+    deleted_at = models.DateTimeField('Удалён', null=True, editable=False)
 
     REQUIRED_FIELDS = ('name', 'text', 'cooking_time',)
 
+    objects = RecipeManager()
+    all_objects = RecipeQuerySet.as_manager()
+
     class Meta:
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['author', '-id'],
+                         name='recipe_author_id_desc_idx'),
+            models.Index(fields=['cooking_time'],
+                         name='recipe_cooking_time_idx'),
+            models.Index(fields=['deleted_at'],
+                         condition=models.Q(deleted_at__isnull=False),
+                         name='recipe_deleted_idx'),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
     def __str__(self):
         return self.name
 
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=('deleted_at', 'updated_at'))
+
+
+class RecipeIngredientQuerySet(models.QuerySet):
+
+    def totals(self, entries, **lookups):
+        """Суммы ингредиентов рецептов из записей entries одним запросом.
+
+        entries — обратная связь рецепта с полем servings (корзина, план
+        питания), lookups — условия на эти записи. Количества умножаются
+        на порции и приводятся к базовой единице через JOIN с
+        UnitConversion, поэтому «кг» и «г» одного продукта складываются.
+        """
+        path = f'recipe__{entries}'
+        return self.filter(recipe__deleted_at__isnull=True, **{
+            f'{path}__{lookup}': value for lookup, value in lookups.items()
+        }).values(
+            name=models.F('ingredient__name'),
+            unit=Coalesce('ingredient__conversion__base_unit',
+                          'ingredient__measurement_unit'),
+        ).annotate(
+            amount=models.Sum(
+                models.F('amount') * models.F(f'{path}__servings')
+                * Coalesce('ingredient__conversion__factor',
+                           models.Value(1.0))
+            )
+        ).order_by('name', 'unit')
+
 
 class RecipeIngredient(models.Model):
     """Модель для добавления ингредиентов в рецепте."""
@@ -131,6 +343,7 @@ class RecipeIngredient(models.Model):
     ingredient = models.ForeignKey(
         Ingredient,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Ингредиент',
     )
     amount = models.PositiveSmallIntegerField(
@@ -142,7 +355,13 @@ class RecipeIngredient(models.Model):
         verbose_name='Количество',
     )
 
+    objects = RecipeIngredientQuerySet.as_manager()
+
     class Meta:
+        indexes = [
+            models.Index(fields=['ingredient', 'recipe'],
+                         name='recipe_ingredient_lookup_idx'),
+        ]
         verbose_name = 'Ингредиент в рецепте',
         verbose_name_plural = 'Ингредиенты в рецепте'
 
@@ -159,6 +378,7 @@ class Favorite(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='user_favorites',
         verbose_name='Владелец списка избранных рецептов',
     )
@@ -166,9 +386,11 @@ class Favorite(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         null=True,
+        db_index=False,
         related_name='favorites',
         verbose_name='Избранные рецепты',
     )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
 
     class Meta:
         verbose_name = 'Список избранных рецептов'
@@ -179,37 +401,211 @@ class Favorite(models.Model):
                 name='unique_favorites'
             ),
         ]
+        indexes = [
+            models.Index(fields=['recipe', 'user'],
+                         name='favorite_recipe_user_idx'),
+        ]
 
     def __str__(self):
         return f'Избранный рецепт {self.user}'
 
 
+class CartQuerySet(models.QuerySet):
+
+    def default(self, user):
+        """Первая корзина пользователя, при отсутствии создаётся."""
+        return (self.filter(user=user).order_by('id').first()
+                or self.create(user=user, name=c.DEFAULT_CART_NAME))
+
+
+class Cart(models.Model):
+    """Именованная корзина покупок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='carts',
+        verbose_name='Владелец корзины',
+    )
+    name = models.CharField(
+        'Название корзины',
+        max_length=c.MAX_LENGTH_FIELDS_FOR_RECIPE,
+    )
+
+    objects = CartQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Корзина'
+        verbose_name_plural = 'Корзины'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_cart_name'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.user})'
+
+
 class ShoppingCart(models.Model):
-    """Модель для добавления рецептов в корзину."""
+    """Модель для добавления рецептов в корзину.
+
+    user дублирует cart.user: по нему считается is_in_shopping_cart
+    и собирается список покупок по всем корзинам.
+    """
 
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='shopping_list',
         verbose_name='Владелец списка покупок',
     )
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='entries',
+        verbose_name='Корзина',
+    )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         null=True,
+        db_index=False,
         related_name='shopping_list',
         verbose_name='Рецепт из списка покупок',
     )
+    servings = models.PositiveSmallIntegerField(
+        'Порций',
+        default=1,
+        validators=[
+            MinValueValidator(c.MIN_SERVINGS,
+                              f'Порций должно быть не меньше '
+                              f'{c.MIN_SERVINGS}')
+        ],
+        help_text='Во сколько раз умножить количества рецепта',
+    )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
 
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
         constraints = [
             models.UniqueConstraint(
-                fields=['user', 'recipe'],
-                name='unique_recipe'
+                fields=['cart', 'recipe'],
+                name='unique_cart_recipe'
             ),
         ]
+        indexes = [
+            models.Index(fields=['recipe', 'user'],
+                         name='shopping_cart_recipe_user_idx'),
+            models.Index(fields=['user', 'recipe'],
+                         name='shopping_cart_user_recipe_idx'),
+        ]
 
     def __str__(self):
         return f'Рецепт из корзины покупок {self.user}'
+
+
+class MealPlan(models.Model):
+    """Рецепт в плане питания пользователя на дату.
+
+    meal — тег приёма пищи (завтрак, обед, ужин).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='meal_plans',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='meal_plans',
+        verbose_name='Рецепт',
+    )
+    date = models.DateField('Дата')
+    meal = models.ForeignKey(
+        Tag,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Приём пищи',
+    )
+    servings = models.PositiveSmallIntegerField(
+        'Порций',
+        default=1,
+        validators=[
+            MinValueValidator(c.MIN_SERVINGS,
+                              f'Порций должно быть не меньше '
+                              f'{c.MIN_SERVINGS}')
+        ],
+        help_text='Во сколько раз умножить количества рецепта',
+    )
+
+    class Meta:
+        ordering = ('date', 'id')
+        verbose_name = 'План питания'
+        verbose_name_plural = 'Планы питания'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'meal', 'recipe'],
+                name='unique_meal_plan'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.recipe} ({self.user})'
+
+
+class Tombstone(models.Model):
+    """Отметка об удалении записи для синхронизации клиентов.
+
+    user — владелец удалённой записи (избранного, корзины, подписки);
+    у удалённых рецептов не задан, такие отметки получают все. Связь
+    без ограничения в БД: отметки пишутся и при каскадном удалении
+    самого пользователя.
+    """
+
+    RECIPE = 'recipe'
+    FAVORITE = 'favorite'
+    CART = 'cart'
+    FOLLOW = 'follow'
+    KINDS = (
+        (RECIPE, 'Рецепт'),
+        (FAVORITE, 'Избранное'),
+        (CART, 'Рецепт в корзине'),
+        (FOLLOW, 'Подписка'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        related_name='+',
+        verbose_name='Владелец',
+    )
+    kind = models.CharField('Что удалено', max_length=16, choices=KINDS)
+    object_id = models.BigIntegerField('id удалённой записи')
+    deleted_at = models.DateTimeField('Удалено', auto_now_add=True)
+
+    class Meta:
+        ordering = ('deleted_at',)
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'],
+                         name='tombstone_user_deleted_idx'),
+        ]
+        verbose_name = 'Удалённая запись'
+        verbose_name_plural = 'Удалённые записи'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}'
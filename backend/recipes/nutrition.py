@@ -0,0 +1,63 @@
+import numpy as np
+from django.utils import timezone
+
+from .models import Recipe, RecipeIngredient
+
+NUTRIENTS = ('kcal', 'proteins', 'fats', 'carbohydrates')
+BATCH_SIZE = 1000
+
+
+def nutrition_totals(recipe_ids):
+    """Пищевая ценность рецептов: {id рецепта: (kcal, proteins, ...)}.
+
+    Строки рецепт × ингредиент всей пачки умножаются на ценность единицы
+    ингредиента и суммируются по рецептам в NumPy. Если хотя бы у одного
+    ингредиента рецепта нет данных, значение рецепта неизвестно (None).
+    """
+    totals = dict.fromkeys(recipe_ids, (None,) * len(NUTRIENTS))
+    rows = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list(
+        'recipe_id', 'amount',
+        *(f'ingredient__{nutrient}' for nutrient in NUTRIENTS)
+    )
+    data = np.array(list(rows), dtype=float).reshape(-1, 2 + len(NUTRIENTS))
+    recipes, index = np.unique(data[:, 0].astype(np.int64),
+                               return_inverse=True)
+    values = data[:, 1:2] * data[:, 2:]
+    sums = np.column_stack([
+        np.bincount(index, weights=column, minlength=len(recipes))
+        for column in values.T
+    ]).round(1)
+    for recipe_id, row in zip(recipes.tolist(), sums.tolist()):
+        totals[recipe_id] = tuple(
+            None if np.isnan(value) else value for value in row
+        )
+    return totals
+
+
+def update_nutrition(recipe_ids):
+    """Пересчитывает и сохраняет пищевую ценность рецептов пачками.
+
+    Записываются только рецепты, у которых ценность изменилась, чтобы
+    updated_at (и синхронизация клиентов) не менялся зря.
+    """
+    recipe_ids = iter(recipe_ids)
+    totals = {}
+    while True:
+        batch = [pk for _, pk in zip(range(BATCH_SIZE), recipe_ids)]
+        if not batch:
+            return totals
+        values = nutrition_totals(batch)
+        stored = {
+            pk: tuple(row) for pk, *row in Recipe.objects.filter(
+                pk__in=batch
+            ).values_list('pk', *NUTRIENTS)
+        }
+        now = timezone.now()
+        Recipe.objects.bulk_update([
+            Recipe(pk=pk, updated_at=now, **dict(zip(NUTRIENTS, row)))
+            for pk, row in values.items()
+            if pk in stored and stored[pk] != row
+        ], [*NUTRIENTS, 'updated_at'])
+        totals.update(values)
@@ -0,0 +1,82 @@
+from django.db import models, transaction
+from django.utils import timezone
+
+from events.models import Event
+from events.outbox import record_many
+from users.models import User
+from .models import Recipe, Tombstone
+
+
+def soft_delete_user(user):
+    """Мягко удаляет пользователя и его рецепты одной транзакцией.
+
+    Рецепты помечаются одним UPDATE, отметки об удалении и события
+    пишутся пачками; очистку ставит в очередь сохранение пользователя.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        recipe_ids = list(Recipe.objects.filter(
+            author=user
+        ).values_list('pk', flat=True))
+        Recipe.objects.filter(pk__in=recipe_ids).update(deleted_at=now,
+                                                        updated_at=now)
+        Tombstone.objects.bulk_create(
+            Tombstone(kind=Tombstone.RECIPE, object_id=pk)
+            for pk in recipe_ids
+        )
+        record_many(Event.RECIPE_DELETED, [
+            {'recipe': pk, 'author': user.pk} for pk in recipe_ids
+        ])
+        user.is_active = False
+        user.deleted_at = now
+        user.save(update_fields=('is_active', 'deleted_at'))
+
+
+def cascades(model):
+    """Связи, строки которых удаляются вместе с объектом model."""
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete
+        and (field.one_to_many or field.one_to_one)
+        and field.on_delete is models.CASCADE
+    ]
+
+
+def purge_rows(model, queryset, batch):
+    """Удаляет до batch строк queryset или самых глубоких зависимых от них.
+
+    Спуск идёт по каскадным связям до таблицы, у строк которой уже нет
+    зависимых, поэтому delete() каждой пачки ничего не каскадирует.
+    Строки удаляются обычным delete(), так что сигналы (отметки для
+    синхронизации, события) срабатывают и для них. Возвращает число
+    удалённых строк.
+    """
+    for relation in cascades(model):
+        related = relation.related_model._base_manager.filter(
+            **{f'{relation.field.name}__in': queryset.values('pk')}
+        )
+        if related.exists():
+            return purge_rows(relation.related_model, related, batch)
+    pks = list(queryset.values_list('pk', flat=True)[:batch])
+    return model._base_manager.filter(pk__in=pks).delete()[0]
+
+
+def purge_object(obj, batch):
+    """Пачка очистки obj: сначала зависимые строки, последним сам obj."""
+    model = type(obj)
+    return purge_rows(model, model._base_manager.filter(pk=obj.pk), batch)
+
+
+def purge(batch):
+    """Одна пачка очистки; 0 — удалять больше нечего.
+
+    Сначала рецепты, потом пользователи: рецепты удалённого
+    пользователя помечены вместе с ним и к его очереди уже удалены.
+    """
+    for manager in (Recipe.all_objects, User.objects):
+        obj = manager.filter(
+            deleted_at__isnull=False
+        ).order_by('deleted_at').first()
+        if obj is not None:
+            return purge_object(obj, batch)
+    return 0
@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from users.models import Follow, User
+from .models import (Favorite, Ingredient, Recipe, ShoppingCart, Tag,
+                     Tombstone)
+from .nutrition import NUTRIENTS
+from .tasks import schedule_purge, update_recipes_nutrition
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def sync_tags_mask(instance, action, reverse, pk_set, **kwargs):
+    """Поддерживает Recipe.tags_mask при изменении тегов рецепта."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.tags_mask = instance.tags.aggregate(
+                mask=Coalesce(Sum('mask'), 0)
+            )['mask']
+            Recipe.objects.filter(pk=instance.pk).update(
+                tags_mask=instance.tags_mask
+            )
+        return
+    if instance.mask is None:
+        return
+    if action == 'post_add':
+        Recipe.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitor(instance.mask), updated_at=Now(),
+        )
+    elif action == 'post_remove':
+        Recipe.objects.filter(pk__in=pk_set).update(
+            tags_mask=F('tags_mask').bitand(~instance.mask), updated_at=Now(),
+        )
+    elif action == 'pre_clear':
+        clear_tag_bit(instance)
+
+
+@receiver(pre_delete, sender=Tag)
+def clear_tag_bit(instance, **kwargs):
+    if instance.mask is not None:
+        Recipe.objects.filter(tags=instance).update(
+            tags_mask=F('tags_mask').bitand(~instance.mask), updated_at=Now(),
+        )
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes(instance, created, update_fields, **kwargs):
+    """Пересчёт рецептов с ингредиентом после смены его ценности."""
+    if created or (update_fields is not None
+                   and not set(update_fields) & set(NUTRIENTS)):
+        return
+    update_recipes_nutrition.enqueue(ingredient_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_tombstone(instance, **kwargs):
+    if instance.deleted_at is None:
+        Tombstone.objects.create(kind=Tombstone.RECIPE, object_id=instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def soft_deleted(sender, instance, update_fields, **kwargs):
+    """Отметка об удалении рецепта и очистка после мягкого удаления."""
+    if not update_fields or 'deleted_at' not in update_fields:
+        return
+    if sender is Recipe:
+        Tombstone.objects.create(kind=Tombstone.RECIPE,
+                                 object_id=instance.pk)
+    transaction.on_commit(schedule_purge)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Follow)
+def user_tombstone(sender, instance, **kwargs):
+    """Отметка для владельца удалённого избранного, корзины, подписки."""
+    kinds = {Favorite: Tombstone.FAVORITE, ShoppingCart: Tombstone.CART,
+             Follow: Tombstone.FOLLOW}
+    Tombstone.objects.create(kind=kinds[sender], object_id=instance.pk,
+                             user_id=instance.user_id)
@@ -0,0 +1,84 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.functions import Now
+from PIL import Image
+
+from jobs.models import Job
+from jobs.queue import task
+from .models import Recipe
+from .nutrition import update_nutrition
+from .purge import purge
+
+
+@task
+def optimize_image(recipe_id, name):
+    """Уменьшает изображение рецепта до RECIPE_IMAGE_MAX_SIDE и пережимает.
+
+    Результат сохраняется под новым именем, старый файл удаляется после
+    смены ссылки. Если изображение рецепта успели заменить, задача
+    ничего не делает.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id, image=name).first()
+    if recipe is None:
+        return
+    storage = recipe.image.storage
+    with storage.open(name) as source:
+        image = Image.open(source)
+        image_format = image.format
+        image.load()
+    side = settings.RECIPE_IMAGE_MAX_SIDE
+    if max(image.size) <= side:
+        return
+    image.thumbnail((side, side))
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, optimize=True)
+    root, extension = os.path.splitext(name)
+    optimized = storage.save(f'{root}_{side}{extension}',
+                             ContentFile(buffer.getvalue()))
+    if Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image=optimized, updated_at=Now()
+    ):
+        storage.delete(name)
+    else:
+        storage.delete(optimized)
+
+
+@task
+def update_recipes_nutrition(ingredient_ids=None):
+    """Пересчитывает пищевую ценность рецептов с этими ингредиентами.
+
+    Без ingredient_ids пересчитываются все рецепты.
+    """
+    recipes = Recipe.objects.order_by('pk')
+    if ingredient_ids is not None:
+        recipes = recipes.filter(
+            recipe_ingredients__ingredient_id__in=ingredient_ids
+        ).distinct()
+    update_nutrition(recipes.values_list('pk', flat=True).iterator())
+
+
+@task
+def purge_deleted():
+    """Удаляет пачку строк мягко удалённых рецептов и пользователей.
+
+    Пока есть что удалять, задача ставит себя в очередь снова: каждая
+    пачка — своя транзакция, блокировки держатся недолго. Без очереди
+    (JOBS_EAGER) пачки удаляются подряд.
+    """
+    while purge(settings.PURGE_BATCH):
+        if not settings.JOBS_EAGER:
+            purge_deleted.enqueue()
+            return
+
+
+def schedule_purge():
+    """Ставит очистку в очередь, если она ещё не ждёт там и не идёт."""
+    if settings.JOBS_EAGER or not Job.objects.filter(
+        name=purge_deleted.name, status__in=(Job.QUEUED, Job.RUNNING)
+    ).exists():
+        purge_deleted.enqueue()
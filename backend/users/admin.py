@@ -1,21 +1,24 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from foodgram.admin_tools import LargeTableMixin, SoftDeleteMixin
 from .models import Follow, User
 
 
 @admin.register(User)
-class UserAdmin(UserAdmin):
+class UserAdmin(SoftDeleteMixin, LargeTableMixin, UserAdmin):
     list_display = (
         'username',
         'email',
         'first_name',
         'last_name',
     )
-    list_filter = ('email', 'username')
-    search_fields = ('username',)
+    list_filter = ('is_staff', 'is_active')
+    search_fields = ('^username', '^email')
 
 
 @admin.register(Follow)
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(LargeTableMixin, admin.ModelAdmin):
     list_display = ('user', 'author',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
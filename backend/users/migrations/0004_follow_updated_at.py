@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_follow_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+    ]
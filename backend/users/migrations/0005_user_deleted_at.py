@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_follow_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Удалён'),
+        ),
+    ]
@@ -1,11 +1,30 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import constraints
+from django.db.models import Exists, OuterRef, Value, constraints
 
 from . import constants as c
 
 
+class UserQuerySet(models.QuerySet):
+    '''Выборки пользователей с данными для сериализации.'''
+
+    def active(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def with_is_subscribed(self, user):
+        if user.is_anonymous:
+            return self.annotate(is_subscribed=Value(False))
+        return self.annotate(is_subscribed=Exists(
+            Follow.objects.filter(user_id=user.id, author=OuterRef('pk'))
+        ))
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     username = models.CharField(
         max_length=c.USER_FIELDS_RESTRICT,
@@ -28,8 +47,11 @@ class User(AbstractUser):
         blank=False,
     )
     USERNAME_FIELD = 'email'
+    deleted_at = models.DateTimeField('Удалён', null=True, editable=False)
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name', 'password')
 
+    objects = UserManager()
+
     class Meta:
         ordering = ['id']
         verbose_name = 'Пользователь'
@@ -38,24 +60,39 @@ class User(AbstractUser):
     def __str__(self) -> str:
         return self.username
 
+    def soft_delete(self):
+        """Скрывает пользователя и его рецепты, вход закрывается.
+
+        Строки удаляет фоновая очистка (recipes.purge).
+        """
+        from recipes.purge import soft_delete_user
+        soft_delete_user(self)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
         related_name='follower',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         related_name='following',
         on_delete=models.CASCADE,
+        db_index=False,
     )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
 
     class Meta:
         constraints = [
             constraints.UniqueConstraint(fields=['user', 'author'],
                                          name='follow_unique')
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
 